@@ -0,0 +1,191 @@
+"""
+Historical backtest of the lay-the-draw strategy.
+
+Replays an archive through the pre.py or play.py model and lays the draw with
+the same Kelly sizing the GUIs recommend, liability capped at 10% of the
+bankroll, settling each bet on the final score while the bankroll carries
+from one match to the next.
+
+The archive is a CSV or Parquet file with one row per pricing point:
+    --model pre      one row per match, PreMatchInputs columns
+    --model inplay   in-play snapshots, InPlayInputs columns ("minute" is
+                     accepted for elapsed_minutes)
+plus match_id, final_home_goals and final_away_goals. account_balance is
+ignored (the simulated bankroll is used instead) and kelly_fraction falls
+back to --kelly when the column is missing. Each match is laid at most once,
+at its first row with a lay edge, in file order.
+
+    python backtest.py archive.csv --model inplay --bankroll 1000
+    python backtest.py season.parquet --model pre --workers 8 --json
+
+Rows are read in chunks and priced on a process pool; only the per-row lay
+decisions come back, so memory stays flat however long the archive is.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+
+from batch import price_in_play_batch, price_pre_match_batch
+from engine import InPlayInputs, PreMatchInputs
+from stream import FIELD_ALIASES
+
+
+# --- Archive Readers ---
+def read_csv_chunks(path, chunk_size):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [FIELD_ALIASES.get(name, name) for name in next(reader)]
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield dict(zip(header, zip(*rows)))
+                rows = []
+        if rows:
+            yield dict(zip(header, zip(*rows)))
+
+def read_parquet_chunks(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet archives needs pyarrow (pip install pyarrow)") from e
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield {FIELD_ALIASES.get(name, name): batch.column(i).to_numpy(zero_copy_only=False)
+               for i, name in enumerate(batch.schema.names)}
+
+def read_chunks(path, chunk_size=20000):
+    """Column dicts of at most chunk_size rows, from a .csv or .parquet archive."""
+    if path.endswith((".parquet", ".pq")):
+        return read_parquet_chunks(path, chunk_size)
+    return read_csv_chunks(path, chunk_size)
+
+def numeric_column(values):
+    """Float array from CSV strings or a Parquet column; blanks and nulls count as zero."""
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiub":
+        return np.nan_to_num(values.astype(float))
+    return np.array([float(v) if v not in ("", None) else 0.0 for v in values])
+
+
+# --- Pricing (runs on the pool) ---
+def price_chunk(job):
+    """
+    Lay decisions for one chunk as (has_lay, liability fraction, draw odds).
+    Liability is linear in the bankroll, so the model is priced with a
+    balance of 1 and the simulated bankroll is applied afterwards.
+    """
+    model, columns, kelly = job
+    record_type = InPlayInputs if model == "inplay" else PreMatchInputs
+    n = len(next(iter(columns.values())))
+    cols = {f.name: numeric_column(columns[f.name]) for f in fields(record_type) if f.name in columns}
+    cols["account_balance"] = np.ones(n)
+    cols.setdefault("kelly_fraction", np.full(n, kelly))
+
+    result = price_in_play_batch(cols) if model == "inplay" else price_pre_match_batch(cols)
+    return result["lay_draw"], result["lay_draw_liability"], cols.get("live_draw_odds", np.zeros(n))
+
+
+def ordered_map(fn, items, workers):
+    """map() over a process pool, in order, with at most 2*workers items in flight."""
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# --- Bankroll Simulation ---
+@dataclass
+class BacktestReport:
+    rows: int = 0
+    bets: int = 0
+    wins: int = 0
+    start_bankroll: float = 0.0
+    final_bankroll: float = 0.0
+    profit: float = 0.0
+    liability_risked: float = 0.0
+    max_drawdown: float = 0.0
+    max_drawdown_pct: float = 0.0
+    hit_rate: float = 0.0
+    roi: float = 0.0            # profit per unit of liability risked
+
+def run_backtest(chunks, model="inplay", bankroll=1000.0, kelly=0.0, commission=0.0, workers=None):
+    report = BacktestReport(start_bankroll=bankroll)
+    balance = peak = bankroll
+    laid = set()
+    meta = deque()
+
+    def jobs():
+        for index, chunk in enumerate(chunks):
+            finals = (numeric_column(chunk["final_home_goals"]), numeric_column(chunk["final_away_goals"]))
+            meta.append((index, chunk.get("match_id"), finals))
+            yield model, {name: col for name, col in chunk.items() if name != "match_id"}, kelly
+
+    for has_lay, fraction, odds in ordered_map(price_chunk, jobs(), workers or os.cpu_count()):
+        index, ids, (final_home, final_away) = meta.popleft()
+        for i in np.flatnonzero(has_lay):
+            match_id = ids[i] if ids is not None else (index, i)   # no ids: one row per match
+            if match_id in laid or balance <= 0:
+                continue
+            laid.add(match_id)
+            liability = balance * fraction[i]
+            if final_home[i] == final_away[i]:
+                pnl = -liability
+            else:
+                pnl = liability / (odds[i] - 1) * (1 - commission)
+                report.wins += 1
+            report.bets += 1
+            report.liability_risked += liability
+            balance += pnl
+            peak = max(peak, balance)
+            if peak - balance > report.max_drawdown:
+                report.max_drawdown = peak - balance
+                report.max_drawdown_pct = (peak - balance) / peak
+        report.rows += len(has_lay)
+
+    report.final_bankroll = balance
+    report.profit = balance - bankroll
+    report.hit_rate = report.wins / report.bets if report.bets else 0.0
+    report.roi = report.profit / report.liability_risked if report.liability_risked else 0.0
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest lay-the-draw over a historical archive.")
+    parser.add_argument("archive", help=".csv or .parquet file")
+    parser.add_argument("--model", choices=["pre", "inplay"], default="inplay")
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--kelly", type=float, default=0.0, help="Kelly %% when the archive has no kelly_fraction; 0 means 12.5%%")
+    parser.add_argument("--commission", type=float, default=0.0, help="exchange commission on winnings, e.g. 0.02")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_backtest(read_chunks(args.archive, args.chunk_size), args.model, args.bankroll,
+                          args.kelly, args.commission, args.workers)
+    if args.json:
+        print(json.dumps(asdict(report)))
+        return 0
+    print(f"Rows priced:     {report.rows}")
+    print(f"Draw lays:       {report.bets} ({report.hit_rate:.1%} won)")
+    print(f"Bankroll:        {report.start_bankroll:.2f} -> {report.final_bankroll:.2f}")
+    print(f"P&L:             {report.profit:+.2f}")
+    print(f"ROI (liability): {report.roi:+.2%}")
+    print(f"Max drawdown:    {report.max_drawdown:.2f} ({report.max_drawdown_pct:.1%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
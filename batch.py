@@ -0,0 +1,215 @@
+"""
+Columnar batch pricing.
+
+Prices a whole card of matches in one call: every input is an array with one
+entry per match (named like the InPlayInputs or PreMatchInputs fields) and
+every output is an array in the same order.
+"""
+import numpy as np
+
+from distributions import (GOAL_RANGE, NB_MAX_GOALS, PMF_CACHE, TAIL_TOLERANCE, _FACTORIALS, _GOALS,
+                           _TOTALS_INDEX, nb_coefficients, quantise)
+from engine import DEFAULT_CONFIG, InPlayInputs, PreMatchInputs, in_play_lambdas
+
+_TOTALS_ONEHOT = (_TOTALS_INDEX[:, None] == np.arange(2 * GOAL_RANGE - 1)).astype(float)
+
+
+# --- Array Helpers ---
+def as_columns(record_type, columns):
+    """Build an input record whose fields are float arrays; missing columns default to zeros."""
+    n = len(next(iter(columns.values())))
+    return record_type(**{
+        name: np.asarray(columns[name], dtype=float) if name in columns else np.zeros(n)
+        for name in record_type.__dataclass_fields__
+    })
+
+def fair_odds(prob):
+    with np.errstate(divide="ignore"):
+        return np.where(prob > 0, 1 / np.where(prob > 0, prob, 1), np.inf)
+
+def kelly_multiplier(percent, default=0.125):
+    multiplier = percent / 100.0
+    return np.where(multiplier <= 0, default, multiplier)
+
+def blend_with_market(model_probs, live_odds, market_weight=0.3):
+    """Row-wise version of engine.blend_with_market over (N, 3) arrays."""
+    with np.errstate(divide="ignore"):
+        market = np.where(live_odds > 0, 1 / np.where(live_odds > 0, live_odds, 1), 0.0)
+    market_total = market.sum(axis=1, keepdims=True)
+    market = np.where(market_total > 0, market / np.where(market_total > 0, market_total, 1), market)
+    final = model_probs * (1 - market_weight) + market * market_weight
+    final_sum = final.sum(axis=1, keepdims=True)
+    return np.where(final_sum > 0, final / np.where(final_sum > 0, final_sum, 1), final)
+
+def kelly_lay(fair, live, balance, multiplier, cap=None, min_odds=1):
+    """Row-wise engine.kelly_lay; rows without a lay get zero edge, liability and stake."""
+    has_lay = (live > min_odds) & (fair > live)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        edge = np.where(has_lay, (fair - live) / fair, 0.0)
+        liability = balance * np.maximum(0, multiplier * edge)
+        if cap is not None:
+            liability = np.minimum(liability, balance * cap)
+        liability = np.where(has_lay, liability, 0.0)      # a negative balance would leave min(0, cap) < 0
+        stake = np.where(has_lay & (live - 1 > 0), liability / np.where(live - 1 > 0, live - 1, 1), 0.0)
+    return has_lay, edge, liability, stake
+
+
+# --- Batch Model Stages ---
+def nb_pmfs(lam, r=3, max_goals=6):
+    """(N, max_goals) Negative Binomial PMFs, one row per match."""
+    p = r / (r + lam)
+    return nb_coefficients(r, max_goals) * (p ** r)[:, None] * np.power((1 - p)[:, None], np.arange(max_goals))
+
+def nb_result_probabilities(lam_h, lam_a, home_goals, away_goals, tail_tol=TAIL_TOLERANCE, r=3):
+    """Row-wise engine.in_play_result_probabilities, returned as an (N, 3) array."""
+    quantum = PMF_CACHE.quanta.get("nb", PMF_CACHE.quantum)     # the lambda grid the engine's cache uses
+    pmf_h = nb_pmfs(quantise(lam_h, quantum), r, max_goals=NB_MAX_GOALS)
+    pmf_a = nb_pmfs(quantise(lam_a, quantum), r, max_goals=NB_MAX_GOALS)
+    # one truncation point for the whole batch, wide enough for its fattest tail
+    keep = max(int((np.cumsum(pmf, axis=1) < 1 - tail_tol).sum(axis=1).max()) + 1
+               for pmf in (pmf_h, pmf_a))
+    pmf_h, pmf_a = pmf_h[:, :keep], pmf_a[:, :keep]
+
+    sf = np.cumsum(pmf_h[:, ::-1], axis=1)[:, ::-1]
+    sf = np.concatenate((sf, np.zeros((len(sf), 1))), axis=1)
+    pmf_ext = np.concatenate((pmf_h, np.zeros((len(pmf_h), 1))), axis=1)
+    need = np.arange(keep)[None, :] - (home_goals - away_goals)[:, None].astype(int)
+    home = (pmf_a * np.take_along_axis(sf, np.clip(need + 1, 0, keep), axis=1)).sum(axis=1)
+    draw_idx = np.where(need < 0, keep, np.minimum(need, keep))
+    draw = (pmf_a * np.take_along_axis(pmf_ext, draw_idx, axis=1)).sum(axis=1)
+    away = pmf_h.sum(axis=1) * pmf_a.sum(axis=1) - home - draw
+
+    probs = np.stack([home, draw, away], axis=1)
+    total = probs.sum(axis=1, keepdims=True)
+    return np.where(total > 0, probs / np.where(total > 0, total, 1), probs)
+
+def zip_pmfs(lam):
+    """(N, GOAL_RANGE) Poisson PMFs, one row per match."""
+    return np.exp(-lam)[:, None] * np.power(lam[:, None], _GOALS) / _FACTORIALS
+
+def scoreline_matrices(lam_h, lam_a):
+    return zip_pmfs(lam_h)[:, :, None] * zip_pmfs(lam_a)[:, None, :]
+
+def matrix_result_probabilities(matrices):
+    """(N, 3) home/draw/away probabilities from (N, G, G) scoreline grids."""
+    goals = np.arange(matrices.shape[1])
+    diff = goals[:, None] - goals[None, :]
+    flat = matrices.reshape(len(matrices), -1)
+    return np.stack([flat @ (diff > 0).ravel(), flat @ (diff == 0).ravel(), flat @ (diff < 0).ravel()], axis=1)
+
+def top_scorelines(matrices, n=5):
+    """(N, n) home goals, away goals and probabilities of each match's n likeliest scorelines."""
+    flat = matrices.reshape(len(matrices), -1)
+    order = np.argsort(-flat, axis=1, kind="stable")[:, :n]
+    cols = matrices.shape[2]
+    return order // cols, order % cols, np.take_along_axis(flat, order, axis=1)
+
+def under_probabilities(matrices, max_extra_goals):
+    """P(at most max_extra_goals more goals) per match; 0 where the line is already gone."""
+    totals = matrices.reshape(len(matrices), -1) @ _TOTALS_ONEHOT
+    cdf = np.cumsum(totals, axis=1)
+    idx = np.clip(max_extra_goals, 0, cdf.shape[1] - 1).astype(int)
+    return np.where(max_extra_goals >= 0, cdf[np.arange(len(cdf)), idx], 0.0)
+
+
+# --- Batch Pricers ---
+def price_in_play_batch(columns, config=DEFAULT_CONFIG):
+    """
+    Price N in-play matches at once.
+    columns maps InPlayInputs field names to length-N arrays; the result maps
+    output names to length-N arrays.
+    """
+    inputs = as_columns(InPlayInputs, columns)
+    lam_h, lam_a = in_play_lambdas(inputs, config)
+    lam_h, lam_a = np.broadcast_to(lam_h, inputs.home_xg.shape), np.broadcast_to(lam_a, inputs.away_xg.shape)
+
+    model = nb_result_probabilities(lam_h, lam_a, inputs.home_goals, inputs.away_goals, r=config.dispersion)
+    live = np.stack([inputs.live_home_odds, inputs.live_draw_odds, inputs.live_away_odds], axis=1)
+    final = blend_with_market(model, live, config.market_weight)
+    fair = fair_odds(final)
+
+    matrices = scoreline_matrices(lam_h, lam_a)
+    under = under_probabilities(matrices, 2 - (inputs.home_goals + inputs.away_goals))
+    flat = matrices.reshape(len(matrices), -1).argmax(axis=1)
+
+    has_lay, edge, liability, stake = kelly_lay(
+        fair[:, 1], inputs.live_draw_odds, np.maximum(inputs.account_balance, 0),
+        kelly_multiplier(inputs.kelly_fraction), cap=0.10)
+
+    return {
+        "lambda_home": lam_h,
+        "lambda_away": lam_a,
+        "model_home": model[:, 0],
+        "model_draw": model[:, 1],
+        "model_away": model[:, 2],
+        "home_prob": final[:, 0],
+        "draw_prob": final[:, 1],
+        "away_prob": final[:, 2],
+        "fair_home_odds": fair[:, 0],
+        "fair_draw_odds": fair[:, 1],
+        "fair_away_odds": fair[:, 2],
+        "under_prob": under,
+        "over_prob": 1 - under,
+        "fair_under_odds": fair_odds(under),
+        "fair_over_odds": fair_odds(1 - under),
+        "top_score_home": inputs.home_goals + flat // GOAL_RANGE,
+        "top_score_away": inputs.away_goals + flat % GOAL_RANGE,
+        "top_score_prob": matrices.reshape(len(matrices), -1).max(axis=1),
+        "lay_draw": has_lay,
+        "lay_draw_edge": edge,
+        "lay_draw_liability": liability,
+        "lay_draw_stake": stake,
+    }
+
+def price_pre_match_batch(columns, top_n=5):
+    """
+    Price N fixtures pre-match at once; the columnar twin of
+    engine.price_pre_match. The top_n likeliest scorelines come back as
+    top{k}_home, top{k}_away and top{k}_prob columns, k = 1..top_n.
+    """
+    inputs = as_columns(PreMatchInputs, columns)
+    lam_h = (inputs.home_scored + inputs.home_xg_scored + inputs.away_conceded + inputs.away_xg_conceded) / 4
+    lam_h = lam_h * (1 - 0.03 * inputs.injuries_home) + inputs.form_home * 0.1 - inputs.position_home * 0.01
+    lam_a = (inputs.away_scored + inputs.away_xg_scored + inputs.home_conceded + inputs.home_xg_conceded) / 4
+    lam_a = lam_a * (1 - 0.03 * inputs.injuries_away) + inputs.form_away * 0.1 - inputs.position_away * 0.01
+
+    matrices = scoreline_matrices(lam_h, lam_a)
+    model = matrix_result_probabilities(matrices)
+    live = np.stack([inputs.live_home_odds, inputs.live_draw_odds, inputs.live_away_odds], axis=1)
+    final = blend_with_market(model, live)
+    fair = fair_odds(final)
+    under = under_probabilities(matrices, np.full(len(matrices), 2))
+
+    has_lay, edge, liability, stake = kelly_lay(
+        fair[:, 1], inputs.live_draw_odds, inputs.account_balance,
+        kelly_multiplier(inputs.kelly_fraction), cap=0.10)
+
+    result = {
+        "lambda_home": lam_h,
+        "lambda_away": lam_a,
+        "model_home": model[:, 0],
+        "model_draw": model[:, 1],
+        "model_away": model[:, 2],
+        "home_prob": final[:, 0],
+        "draw_prob": final[:, 1],
+        "away_prob": final[:, 2],
+        "fair_home_odds": fair[:, 0],
+        "fair_draw_odds": fair[:, 1],
+        "fair_away_odds": fair[:, 2],
+        "under_prob": under,
+        "over_prob": 1 - under,
+        "fair_under_odds": fair_odds(under),
+        "fair_over_odds": fair_odds(1 - under),
+    }
+    top_home, top_away, top_prob = top_scorelines(matrices, top_n)
+    for k in range(top_n):
+        result[f"top{k + 1}_home"] = top_home[:, k]
+        result[f"top{k + 1}_away"] = top_away[:, k]
+        result[f"top{k + 1}_prob"] = top_prob[:, k]
+    result.update({
+        "lay_draw": has_lay,
+        "lay_draw_edge": edge,
+        "lay_draw_liability": liability,
+        "lay_draw_stake": stake,
+    })
+    return result
@@ -0,0 +1,256 @@
+"""
+Benchmark and sanity suite for the four pricing paths.
+
+Prices a fixed synthetic corpus (seeded, so every run sees the same matches)
+through the pre-match, in-play, correct-score and unders pricers and reports,
+per path, throughput (matches/sec), p50/p99 latency and peak traced memory.
+Every result is also checked against probability invariants: scoreline
+matrices sum to about 1, 1X2 and Under/Over fair odds imply books of exactly
+100%, the Under ladder is monotone and lays stay inside their caps. A few
+in-play matches are also run through simulate.py and checked the same way.
+
+    python bench.py                              # report only
+    python bench.py --save-baseline              # record bench_baseline.json
+    python bench.py --baseline bench_baseline.json --tolerance 0.25
+
+With --baseline the run fails (exit 1) when a path is slower or larger than
+its baseline by more than the tolerance; any invariant violation always fails
+it. Baselines are machine-specific, so record one per box rather than
+committing it. Nothing here needs a network or a display.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from engine import (InPlayInputs, PreMatchInputs, matrix_result_probabilities, price_correct_score,
+                    price_in_play, price_pre_match, price_unders, totals_distribution, under_probability)
+from simulate import check_simulation, simulate_match
+
+DEFAULT_BASELINE = "bench_baseline.json"
+MATRIX_TOLERANCE = 5e-3        # mass the 10x10 grid may lose to its truncated tail
+PROB_TOLERANCE = 1e-9
+LAY_CAP = 0.10
+
+
+# --- Synthetic Corpus ---
+def synthetic_corpus(n=500, seed=2024):
+    """{path: [args, ...]} with n matches per path, the same for a given seed."""
+    rng = np.random.default_rng(seed)
+
+    def u(lo, hi):
+        return float(rng.uniform(lo, hi))
+
+    corpus = {"pre": [], "inplay": [], "correct-score": [], "unders": []}
+    for _ in range(n):
+        home_avg, away_avg = u(0.8, 2.2), u(0.6, 1.8)
+        draw_odds = u(2.8, 4.2)
+        corpus["pre"].append((PreMatchInputs(
+            home_scored=home_avg, home_conceded=u(0.7, 1.8), away_conceded=u(0.9, 2.0), away_scored=away_avg,
+            injuries_home=int(rng.integers(0, 4)), injuries_away=int(rng.integers(0, 4)),
+            position_home=int(rng.integers(1, 21)), position_away=int(rng.integers(1, 21)),
+            form_home=int(rng.integers(0, 6)), form_away=int(rng.integers(0, 6)),
+            home_xg_scored=u(0.8, 2.2), away_xg_scored=u(0.6, 1.8),
+            home_xg_conceded=u(0.7, 1.8), away_xg_conceded=u(0.9, 2.0),
+            live_under_odds=u(1.6, 2.4), live_over_odds=u(1.6, 2.4),
+            live_home_odds=u(1.5, 4.0), live_draw_odds=draw_odds, live_away_odds=u(2.0, 7.0),
+            account_balance=1000.0, kelly_fraction=25.0),))
+
+        minute = int(rng.integers(0, 89))
+        goals_h, goals_a = int(rng.integers(0, 3)), int(rng.integers(0, 3))
+        inputs = InPlayInputs(
+            home_avg_scored=home_avg, home_avg_conceded=u(0.7, 1.8),
+            away_avg_scored=away_avg, away_avg_conceded=u(0.9, 2.0),
+            home_xg=u(0.8, 2.2), away_xg=u(0.6, 1.8), home_xg_against=u(0.7, 1.8), away_xg_against=u(0.9, 2.0),
+            elapsed_minutes=minute, home_goals=goals_h, away_goals=goals_a,
+            in_game_home_xg=u(0, 2.5) * minute / 90, in_game_away_xg=u(0, 2.0) * minute / 90,
+            home_possession=u(35, 65), away_possession=u(35, 65),
+            home_sot=int(rng.integers(0, 8)), away_sot=int(rng.integers(0, 8)),
+            home_opp_box=int(rng.integers(0, 30)), away_opp_box=int(rng.integers(0, 30)),
+            home_corners=int(rng.integers(0, 9)), away_corners=int(rng.integers(0, 9)),
+            account_balance=1000.0, kelly_fraction=25.0,
+            live_under_odds=u(1.2, 3.5), live_over_odds=u(1.2, 3.5),
+            live_home_odds=u(1.3, 8.0), live_draw_odds=u(2.2, 6.0), live_away_odds=u(1.5, 12.0))
+        targets = [((goals_h + dh, goals_a + da), u(4.0, 15.0)) for dh, da in ((0, 0), (1, 0), (0, 1), (1, 1))]
+        corpus["inplay"].append((inputs,))
+        corpus["correct-score"].append((inputs, targets))
+        corpus["unders"].append((inputs,))
+    return corpus
+
+PRICERS = {
+    "pre": price_pre_match,
+    "inplay": price_in_play,
+    "correct-score": price_correct_score,
+    "unders": price_unders,
+}
+
+
+# --- Invariants ---
+def _close(a, b, tol=PROB_TOLERANCE):
+    return abs(a - b) <= tol
+
+def check_result(path, args, result):
+    """Invariant violations for one priced match, as messages (empty when all hold)."""
+    inputs = args[0]
+    bad = []
+    matrix = result.matrix
+    if (matrix < 0).any() or not (1 - MATRIX_TOLERANCE <= matrix.sum() <= 1 + PROB_TOLERANCE):
+        bad.append(f"matrix sums to {matrix.sum():.6f}")
+    # the pre-match model reads 1X2 straight off the grid, so it shares the grid's truncation
+    for kind, probs, tol in (
+            ("model", (result.model_home, result.model_draw, result.model_away), MATRIX_TOLERANCE),
+            ("blended", (result.home_prob, result.draw_prob, result.away_prob), PROB_TOLERANCE)):
+        if min(probs) < 0 or not _close(sum(probs), 1, tol):
+            bad.append(f"{kind} 1X2 sums to {sum(probs):.9f}")
+    book = sum(1 / o for o in (result.fair_home_odds, result.fair_draw_odds, result.fair_away_odds))
+    if not _close(book, 1, 1e-6):
+        bad.append(f"fair 1X2 book is {book:.2%}")
+    if path == "pre":
+        model = matrix_result_probabilities(matrix)
+        if not np.allclose((result.model_home, result.model_draw, result.model_away), model, rtol=0, atol=1e-12):
+            bad.append("pre-match 1X2 disagrees with its scoreline grid")
+
+    if path == "unders":
+        under = under_probability(totals_distribution(matrix), 1)
+        if not _close(result.under_prob, under, MATRIX_TOLERANCE):
+            bad.append(f"Under {result.under_line} {result.under_prob:.4f} vs grid {under:.4f}")
+        if not _close(1 / result.fair_under_odds, result.under_prob, 1e-9):
+            bad.append("fair Under odds do not invert the Under probability")
+        ladder = result.ladder
+        if np.any(np.diff(ladder.under_probs) < -PROB_TOLERANCE):
+            bad.append("Under ladder is not monotone")
+        if not np.allclose(ladder.under_probs + ladder.over_probs, 1):
+            bad.append("Under + Over differ from 1 on the ladder")
+        lays = [result.lay_under] if result.lay_under else []
+    else:
+        if not _close(result.under_prob + result.over_prob, 1):
+            bad.append("Under + Over 2.5 differ from 1")
+        if result.under_prob > 0 and not _close(1 / result.fair_under_odds + 1 / result.fair_over_odds, 1, 1e-6):
+            bad.append("fair Under/Over 2.5 book is not 100%")
+        extra = 2 - getattr(inputs, "home_goals", 0) - getattr(inputs, "away_goals", 0)
+        under = under_probability(totals_distribution(matrix), extra)
+        if not _close(result.under_prob, under, MATRIX_TOLERANCE):
+            bad.append(f"Under 2.5 {result.under_prob:.4f} vs grid {under:.4f}")
+        lays = [result.lay_draw] if result.lay_draw else []
+        if result.lay_draw and result.lay_draw.liability > LAY_CAP * inputs.account_balance + 1e-9:
+            bad.append("draw lay liability above its cap")
+
+    if path == "correct-score":
+        total = sum(p for _, p in result.book)
+        if not _close(total, matrix.sum(), 1e-9):
+            bad.append(f"correct-score book sums to {total:.6f}")
+        if any(lay.liability > LAY_CAP * inputs.account_balance + 1e-6 for lay in result.portfolio):
+            bad.append("portfolio liability above its cap")
+        lays += result.lays + result.portfolio
+    if any(lay.stake < 0 or lay.liability < 0 for lay in lays):
+        bad.append("negative lay stake or liability")
+    return bad
+
+def check_simulations(cases, paths=20000, seed=2024):
+    """Invariant violations of the Monte Carlo simulator over in-play cases."""
+    return [f"simulate: {msg}" for (inputs,) in cases
+            for msg in check_simulation(inputs, simulate_match(inputs, paths, seed))]
+
+
+# --- Measurement ---
+def bench_path(path, cases, repeat=1):
+    """Latency, throughput, peak memory and invariant violations for one pricing path."""
+    pricer = PRICERS[path]
+    for args in cases[:10]:
+        pricer(*args)                   # warm imports and caches
+    latencies = []
+    violations = []
+    for _ in range(repeat):
+        for args in cases:
+            start = time.perf_counter_ns()
+            result = pricer(*args)
+            latencies.append(time.perf_counter_ns() - start)
+            if len(violations) < 20:
+                violations += [f"{path}: {msg}" for msg in check_result(path, args, result)]
+    latencies = np.array(latencies) / 1e3           # microseconds
+
+    tracemalloc.start()
+    for args in cases:
+        pricer(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "matches": len(latencies),
+        "throughput": float(len(cases) / (latencies.reshape(repeat, -1).sum(axis=1).min() / 1e6)),   # fastest pass
+        "p50_us": float(np.percentile(latencies, 50)),
+        "p99_us": float(np.percentile(latencies, 99)),
+        "peak_kib": peak / 1024,
+        "violations": violations,
+    }
+
+def run_bench(n=500, seed=2024, repeat=1, paths=tuple(PRICERS)):
+    corpus = synthetic_corpus(n, seed)
+    return {
+        "corpus": {"n": n, "seed": seed, "repeat": repeat},
+        "machine": {"python": platform.python_version(), "numpy": np.__version__,
+                    "platform": platform.platform(), "cpus": os.cpu_count()},
+        "paths": {path: bench_path(path, corpus[path], repeat) for path in paths},
+    }
+
+def regressions(report, baseline, tolerance=0.25):
+    """Messages for every path slower, or bigger, than baseline by more than tolerance."""
+    out = []
+    for path, now in report["paths"].items():
+        base = baseline.get("paths", {}).get(path)
+        if base is None:
+            continue
+        if now["throughput"] < base["throughput"] * (1 - tolerance):
+            out.append(f"{path}: throughput {now['throughput']:.0f}/s vs baseline {base['throughput']:.0f}/s")
+        for key, unit in (("p50_us", "us"), ("p99_us", "us"), ("peak_kib", "KiB")):
+            if now[key] > base[key] * (1 + tolerance):
+                out.append(f"{path}: {key} {now[key]:.1f}{unit} vs baseline {base[key]:.1f}{unit}")
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and sanity-check the pricing paths.")
+    parser.add_argument("--matches", type=int, default=500, help="synthetic matches per path")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the corpus")
+    parser.add_argument("--paths", nargs="+", choices=list(PRICERS), default=list(PRICERS))
+    parser.add_argument("--baseline", help="fail on regressions against this baseline JSON")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"write this run as the baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / growth, e.g. 0.25")
+    parser.add_argument("--simulations", type=int, default=20, help="in-play matches to check through simulate.py")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_bench(args.matches, args.seed, args.repeat, args.paths)
+    failures = [v for stats in report["paths"].values() for v in stats["violations"]]
+    if args.simulations:
+        failures += check_simulations(synthetic_corpus(args.simulations, args.seed)["inplay"])
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != report["corpus"]:
+            print("Warning: baseline was recorded on a different corpus", file=sys.stderr)
+        failures += regressions(report, baseline, args.tolerance)
+
+    if args.json:
+        print(json.dumps(dict(report, failures=failures)))
+    else:
+        print(f"{'Path':<14}{'Matches/s':>11}{'p50 us':>10}{'p99 us':>10}{'Peak KiB':>10}")
+        for path, stats in report["paths"].items():
+            print(f"{path:<14}{stats['throughput']:>11.0f}{stats['p50_us']:>10.1f}"
+                  f"{stats['p99_us']:>10.1f}{stats['peak_kib']:>10.1f}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+    if args.save_baseline and not failures:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
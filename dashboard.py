@@ -0,0 +1,216 @@
+"""
+One window for a whole card of in-play matches.
+
+Match states live in a MatchStateTable and are fed by the same JSON-lines
+events as stream.py - from a file, stdin or a socket, or typed into the
+event box at the bottom. A reader thread only queues raw lines; every poll
+the Tk thread merges what has arrived, reprices the changed matches in one
+batch and refreshes just their rows of the grid. Click a column heading to
+sort by it (again to reverse).
+
+    python dashboard.py --input feed.jsonl --replay --speed 10
+    python dashboard.py --input tcp:127.0.0.1:9000
+    python dashboard.py                          # events typed in by hand
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+from matchstate import MatchStateTable
+from stream import open_source, replay
+
+POLL_MS = 250
+MAX_EVENTS_PER_POLL = 5000
+
+# column id -> (heading, width)
+COLUMNS = {
+    "match":      ("Match", 140),
+    "minute":     ("Min", 45),
+    "score":      ("Score", 55),
+    "home":       ("Home F|L", 100),
+    "draw":       ("Draw F|L", 100),
+    "away":       ("Away F|L", 100),
+    "under":      ("U2.5 F|L", 100),
+    "draw_edge":  ("Lay Draw Edge", 95),
+    "under_edge": ("Lay U2.5 Edge", 95),
+    "stake":      ("Lay Draw Stake", 100),
+    "cs_lays":    ("CS Lays", 60),
+}
+
+
+def odds_pair(fair, live):
+    return f"{fair:.2f} | {live:.2f}" if live > 0 else f"{fair:.2f} | -"
+
+def percent(edge):
+    return "-" if np.isnan(edge) else f"{edge:.1%}"
+
+
+# --- Dashboard ---
+class Dashboard:
+    def __init__(self, root, table=None, poll_ms=POLL_MS):
+        self.root = root
+        self.table = MatchStateTable() if table is None else table
+        self.poll_ms = poll_ms
+        self.events = queue.Queue()
+        self.sort_column, self.sort_reverse = "match", False
+
+        root.title("Odds Apex - Dashboard")
+        frame = tk.Frame(root)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(frame, columns=list(COLUMNS), show="headings")
+        for column, (heading, width) in COLUMNS.items():
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, anchor="center")
+        vsb = tk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.tag_configure("lay", foreground="red")
+        self.tree.tag_configure("normal", foreground="black")
+
+        controls = tk.Frame(root)
+        controls.pack(fill=tk.X)
+        tk.Label(controls, text="Event (JSON)").pack(side=tk.LEFT, padx=5)
+        self.event_entry = tk.Entry(controls, width=80)
+        self.event_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5, pady=5)
+        self.event_entry.bind("<Return>", lambda e: self.submit_event())
+        tk.Button(controls, text="Apply", command=self.submit_event).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Remove Selected", command=self.remove_selected).pack(side=tk.LEFT, padx=5)
+        self.status = tk.Label(root, anchor="w")
+        self.status.pack(fill=tk.X)
+
+        root.after(self.poll_ms, self.poll)
+
+    # --- Event Input ---
+    def follow(self, lines):
+        """Queue lines from an event source on a daemon reader thread."""
+        def read():
+            for line in lines:
+                self.events.put(line)
+        threading.Thread(target=read, daemon=True).start()
+
+    def submit_event(self):
+        self.events.put(self.event_entry.get())
+        self.event_entry.delete(0, tk.END)
+
+    def remove_selected(self):
+        for match_id in self.tree.selection():
+            self.table.remove(match_id)
+            self.tree.delete(match_id)
+
+    def poll(self):
+        """Merge queued events, reprice the changed matches in one batch and refresh their rows."""
+        try:
+            for _ in range(MAX_EVENTS_PER_POLL):
+                try:
+                    line = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                    if not isinstance(event, dict):
+                        raise ValueError(f"expected a JSON object, got {line.strip()[:40]!r}")
+                    self.table.merge(event)
+                except Exception as e:      # one bad feed line must not stop the polling
+                    self.status.config(text=f"Skipping bad event: {e}")
+            rows = self.table.reprice()
+            if len(rows):
+                self.refresh(rows)
+                self.status.config(text=f"{len(self.table)} matches, {len(rows)} repriced")
+        finally:
+            self.root.after(self.poll_ms, self.poll)
+
+    # --- Grid ---
+    def row_values(self, rows):
+        """Display strings for table rows, column by column."""
+        table = self.table
+        inputs, prices = table.inputs[rows], table.prices[rows]
+        edges = table.edges(rows)
+        display = {
+            "match": [table.ids[row] for row in rows],
+            "minute": [f"{m:.0f}" for m in inputs["elapsed_minutes"]],
+            "score": [f"{h:.0f}-{a:.0f}" for h, a in zip(inputs["home_goals"], inputs["away_goals"])],
+            "stake": [f"{s:.2f}" if lay else "-" for s, lay in zip(prices["lay_draw_stake"], prices["lay_draw"])],
+            "cs_lays": (prices["target_stake"] > 0).sum(axis=1),
+        }
+        for name in ("home", "draw", "away", "under"):
+            display[name] = [odds_pair(f, l) for f, l in zip(prices[f"fair_{name}_odds"], inputs[f"live_{name}_odds"])]
+        for name in ("draw", "under"):
+            display[f"{name}_edge"] = [percent(e) for e in edges[name]]
+        return display
+
+    def sort_keys(self, column):
+        """Sort key of every table row for one column."""
+        table = self.table
+        n = len(table)
+        inputs, prices = table.inputs[:n], table.prices[:n]
+        if column == "match":
+            return table.ids
+        if column == "minute":
+            return inputs["elapsed_minutes"]
+        if column == "score":
+            return inputs["home_goals"] + inputs["away_goals"]
+        if column == "stake":
+            return prices["lay_draw_stake"]
+        if column == "cs_lays":
+            return (prices["target_stake"] > 0).sum(axis=1)
+        if column.endswith("_edge"):
+            return np.nan_to_num(table.edges()[column[:-len("_edge")]], nan=-np.inf)
+        return prices[f"fair_{column}_odds"]
+
+    def refresh(self, rows):
+        """Redraw the given table rows, adding grid rows for new matches."""
+        match_ids = self.table.match_ids(rows)
+        display = self.row_values(rows)
+        lays = self.table.prices["lay_draw"][rows]
+        for i, match_id in enumerate(match_ids):
+            values = [display[column][i] for column in COLUMNS]
+            tags = ("lay" if lays[i] else "normal",)
+            if self.tree.exists(match_id):
+                self.tree.item(match_id, values=values, tags=tags)
+            else:
+                self.tree.insert("", tk.END, iid=match_id, values=values, tags=tags)
+        self.sort()
+
+    def sort_by(self, column):
+        self.sort_reverse = not self.sort_reverse if column == self.sort_column else False
+        self.sort_column = column
+        self.sort()
+
+    def sort(self):
+        key = self.sort_keys(self.sort_column)
+        order = sorted(range(len(self.table)), key=key.__getitem__, reverse=self.sort_reverse)
+        for index, row in enumerate(order):
+            self.tree.move(self.table.ids[row], "", index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price many in-play matches in one sortable window.")
+    parser.add_argument("--input", help='"-", a file, tcp:host:port or unix:/path (default: events typed in)')
+    parser.add_argument("--replay", action="store_true", help="pace a recorded file by its event timestamps")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up; 0 means as fast as possible")
+    parser.add_argument("--time-key", default="ts")
+    parser.add_argument("--poll-ms", type=int, default=POLL_MS, help="how often queued events are priced")
+    parser.add_argument("--max-matches", type=int, help="refuse new matches beyond this many")
+    args = parser.parse_args(argv)
+
+    root = tk.Tk()
+    dashboard = Dashboard(root, MatchStateTable(max_matches=args.max_matches), poll_ms=args.poll_ms)
+    if args.input:
+        lines = open_source(args.input)
+        if args.replay:
+            lines = replay(lines, args.speed, args.time_key)
+        dashboard.follow(lines)
+    root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Goal-count distributions shared by the pricers.
+
+Builds zero-inflated Poisson and Negative Binomial PMFs as arrays and keeps
+recently used ones in a bounded LRU cache, since in-play lambdas barely move
+between refreshes.
+"""
+import math
+import threading
+from collections import OrderedDict, namedtuple
+from math import comb
+
+import numpy as np
+
+GOAL_RANGE = 10
+_FACTORIALS = np.array([math.factorial(k) for k in range(GOAL_RANGE)], dtype=float)
+_GOALS = np.arange(GOAL_RANGE)
+_TOTALS_INDEX = np.add.outer(_GOALS, _GOALS).ravel()
+NB_MAX_GOALS = 64              # PMF length before the tail tolerance trims it
+NB_QUANTUM = 1e-4              # relative lambda grid of the cached Negative Binomial 1X2 PMFs
+TAIL_TOLERANCE = 1e-10
+_NB_GOALS = np.arange(NB_MAX_GOALS)
+_NB_COEFFICIENTS = {r: np.array([comb(k + r - 1, k) for k in _NB_GOALS], dtype=float) for r in (2, 3)}
+
+
+def zip_probability(lam, k, p_zero=0.0):
+    """
+    Zero-inflated Poisson probability.
+    p_zero is set to 0.0 to remove extra weighting for 0 goals.
+    """
+    if k == 0:
+        return p_zero + (1 - p_zero) * math.exp(-lam)
+    return (1 - p_zero) * ((lam ** k) * math.exp(-lam)) / math.factorial(k)
+
+def zip_pmf(lam, p_zero=0.0, goal_range=GOAL_RANGE):
+    """Zero-inflated Poisson probabilities for 0..goal_range-1 goals as an array."""
+    pmf = (1 - p_zero) * np.exp(-lam) * np.power(lam, _GOALS[:goal_range]) / _FACTORIALS[:goal_range]
+    pmf[0] += p_zero
+    return pmf
+
+def nb_coefficients(r, max_goals):
+    """
+    comb(k + r - 1, k) for k = 0..max_goals-1, from the recurrence
+    c[k+1] = c[k] * (k + r) / (k + 1). Tables for r=2 and r=3 are precomputed.
+    """
+    table = _NB_COEFFICIENTS.get(r)
+    if table is None or len(table) < max_goals:
+        ratios = (np.arange(max_goals - 1) + r) / (np.arange(max_goals - 1) + 1)
+        table = np.concatenate(([1.0], np.cumprod(ratios)))
+        if r in _NB_COEFFICIENTS:
+            _NB_COEFFICIENTS[r] = table
+    return table[:max_goals]
+
+def nb_pmf(expected_lambda, r=3, max_goals=6):
+    """Negative Binomial probabilities for 0..max_goals-1 goals with mean expected_lambda."""
+    p = r / (r + expected_lambda)
+    return nb_coefficients(r, max_goals) * (p ** r) * np.power(1 - p, np.arange(max_goals))
+
+def truncate_tail(pmf, tail_tol=TAIL_TOLERANCE, cdf=None):
+    """Drop the upper tail of a PMF once the retained mass is within tail_tol of 1."""
+    if cdf is None:
+        cdf = np.cumsum(pmf)
+    keep = np.searchsorted(cdf, 1 - tail_tol) + 1
+    return pmf[:keep]
+
+def result_probabilities(pmf_home, pmf_away, goal_diff=0):
+    """
+    Home/draw/away probabilities from two independent goal PMFs when home
+    leads by goal_diff. Each diagonal of the scoreline grid is read off a
+    survival sum, so this is O(K) rather than a K x K accumulation.
+    """
+    k_home = len(pmf_home)
+    sf = np.append(np.cumsum(pmf_home[::-1])[::-1], 0.0)   # sf[k] = P(X >= k)
+    pmf_ext = np.append(pmf_home, 0.0)                       # pmf_ext[-1] = P(X = out of range)
+    need = np.arange(len(pmf_away)) - goal_diff               # home goals that level away goal count y
+    home = pmf_away @ sf[np.clip(need + 1, 0, k_home)]
+    draw = pmf_away @ pmf_ext[np.clip(need, -1, k_home)]
+    away = pmf_home.sum() * pmf_away.sum() - home - draw
+    return float(home), float(draw), float(away)
+
+def quantise(lam, quantum):
+    """Lambdas (array) rounded on log lambda to the relative step quantum, as DistributionCache keys them."""
+    lam = np.asarray(lam, dtype=float)
+    if quantum <= 0:
+        return lam
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rounded = np.exp(np.round(np.log(lam) / quantum) * quantum)
+    return np.where(lam > 0, rounded, lam)
+
+
+# --- Distribution Cache ---
+GoalDistribution = namedtuple("GoalDistribution", ["pmf", "cdf"])
+
+_BUILDERS = {
+    "zip": lambda lam, r, max_goals: zip_pmf(lam, goal_range=max_goals),
+    "nb":  lambda lam, r, max_goals: nb_pmf(lam, r=r, max_goals=max_goals),
+}
+
+class DistributionCache:
+    """
+    Bounded, thread-safe LRU cache of goal PMF/CDF vectors.
+
+    Entries are keyed on (distribution, lambda, r, max_goals). A quantum > 0
+    rounds log lambda to that relative step (lambda moves by at most
+    quantum / 2 of itself) and builds the PMF at the rounded lambda, so
+    every hit is exactly what a miss would have produced; quantum 0 keys on
+    the exact lambda. `quanta` sets it per distribution, overriding `quantum`.
+
+    The shared PMF_CACHE keeps "zip" exact: the scoreline grid feeds long
+    odds such as 1 / P(Over 6.5), read off 1 - CDF, which shift at 2 dp when
+    lambda moves by a single ulp. "nb" only feeds the model 1X2 split, where
+    NB_QUANTUM = 1e-4 moves the probabilities by under 2e-5 and the blended
+    fair 1X2 odds by under 1e-4 of themselves (a 3.50 price by < 0.0004), so
+    a displayed 2-dp price, or a lay edge or stake derived from it, can only
+    tick by 0.01 when it sits on a rounding edge. The least recently used entry is evicted once `maxsize` is
+    reached; maxsize=0 disables caching.
+    """
+    def __init__(self, maxsize=4096, quantum=0.0, quanta=None):
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.quanta = dict(quanta or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dist, lam, r=None, max_goals=GOAL_RANGE):
+        lam = float(lam)
+        quantum = self.quanta.get(dist, self.quantum)
+        if quantum > 0 and lam > 0:
+            step = round(math.log(lam) / quantum)
+            lam_q = math.exp(step * quantum)
+        else:
+            step = lam_q = lam
+        key = (dist, step, quantum, r, max_goals)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        pmf = _BUILDERS[dist](lam_q, r, max_goals)
+        cdf = np.cumsum(pmf)
+        pmf.flags.writeable = False
+        cdf.flags.writeable = False
+        entry = GoalDistribution(pmf, cdf)
+        if self.maxsize <= 0:
+            return entry
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "quantum": self.quantum,
+                "quanta": dict(self.quanta),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+# Shared by the engine; resize or re-quantise it in place, e.g. PMF_CACHE.quanta["nb"] = 0
+PMF_CACHE = DistributionCache(quanta={"nb": NB_QUANTUM})
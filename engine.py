@@ -0,0 +1,567 @@
+"""
+Headless pricing engine for the Odds Apex scripts.
+
+Every pricer takes an input record and returns a result record without
+touching Tk, so matches can be priced from batch jobs or services and the
+GUIs only have to read their entries and format the result.
+"""
+import math
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+
+import numpy as np
+
+from distributions import (NB_MAX_GOALS, PMF_CACHE, TAIL_TOLERANCE, _TOTALS_INDEX,
+                           result_probabilities, truncate_tail)
+from kelly import lay_portfolio
+from profiling import stage
+
+
+# --- Utility Functions ---
+def fair_odds(prob):
+    return (1/prob) if prob > 0 else float('inf')
+
+def kelly_multiplier(percent, default=0.125):
+    """Kelly fraction from a percentage input; non-positive values fall back to 12.5%."""
+    multiplier = percent / 100.0
+    if multiplier <= 0:
+        multiplier = default
+    return multiplier
+
+
+# --- Input Records ---
+# Field names mirror the GUI entry keys without their "entry_" prefix.
+@dataclass
+class PreMatchInputs:
+    home_scored: float = 0.0
+    home_conceded: float = 0.0
+    away_conceded: float = 0.0
+    away_scored: float = 0.0
+    injuries_home: int = 0
+    injuries_away: int = 0
+    position_home: int = 0
+    position_away: int = 0
+    form_home: int = 0
+    form_away: int = 0
+    home_xg_scored: float = 0.0
+    away_xg_scored: float = 0.0
+    home_xg_conceded: float = 0.0
+    away_xg_conceded: float = 0.0
+    live_under_odds: float = 0.0
+    live_over_odds: float = 0.0
+    live_home_odds: float = 0.0
+    live_draw_odds: float = 0.0
+    live_away_odds: float = 0.0
+    account_balance: float = 0.0
+    kelly_fraction: float = 0.0     # percent; 0 means the 12.5% default
+
+@dataclass
+class InPlayInputs:
+    home_avg_scored: float = 0.0
+    home_avg_conceded: float = 0.0
+    away_avg_scored: float = 0.0
+    away_avg_conceded: float = 0.0
+    home_xg: float = 0.0
+    away_xg: float = 0.0
+    home_xg_against: float = 0.0
+    away_xg_against: float = 0.0
+    elapsed_minutes: float = 0.0
+    home_goals: int = 0
+    away_goals: int = 0
+    in_game_home_xg: float = 0.0
+    in_game_away_xg: float = 0.0
+    home_possession: float = 0.0
+    away_possession: float = 0.0
+    home_sot: int = 0
+    away_sot: int = 0
+    home_opp_box: float = 0.0
+    away_opp_box: float = 0.0
+    home_corners: float = 0.0
+    away_corners: float = 0.0
+    account_balance: float = 0.0
+    kelly_fraction: float = 0.0     # percent; 0 means the 12.5% default
+    live_under_odds: float = 0.0
+    live_over_odds: float = 0.0
+    live_home_odds: float = 0.0
+    live_draw_odds: float = 0.0
+    live_away_odds: float = 0.0
+
+# --- Result Records ---
+@dataclass
+class LayRecommendation:
+    selection: str
+    edge: float
+    liability: float
+    stake: float
+
+@dataclass
+class TotalsLadder:
+    lines: np.ndarray           # total-goals lines, counting goals already scored
+    under_probs: np.ndarray
+    over_probs: np.ndarray
+    fair_under_odds: np.ndarray
+    fair_over_odds: np.ndarray
+    lays: list = field(default_factory=list)
+
+@dataclass
+class PreMatchResult:
+    lambda_home: float
+    lambda_away: float
+    model_home: float
+    model_draw: float
+    model_away: float
+    home_prob: float
+    draw_prob: float
+    away_prob: float
+    fair_home_odds: float
+    fair_draw_odds: float
+    fair_away_odds: float
+    matrix: np.ndarray          # P(home i, away j) scoreline grid
+    top_scorelines: list
+    under_prob: float
+    over_prob: float
+    fair_under_odds: float
+    fair_over_odds: float
+    lay_draw: LayRecommendation = None
+
+@dataclass
+class InPlayResult:
+    lambda_home: float
+    lambda_away: float
+    model_home: float
+    model_draw: float
+    model_away: float
+    home_prob: float
+    draw_prob: float
+    away_prob: float
+    fair_home_odds: float
+    fair_draw_odds: float
+    fair_away_odds: float
+    matrix: np.ndarray          # P(i, j) more goals from the current score
+    top_scorelines: list        # keyed on the final score
+    under_prob: float           # Under 2.5 including goals already scored
+    over_prob: float
+    fair_under_odds: float
+    fair_over_odds: float
+    lay_draw: LayRecommendation = None
+    ladder: TotalsLadder = None
+
+@dataclass
+class CorrectScoreResult(InPlayResult):
+    lays: list = field(default_factory=list)
+    portfolio: list = field(default_factory=list)   # joint lays sized across all targets; edge is
+                                                    # (fair - live) / fair, below 0 for hedging legs
+    book: list = field(default_factory=list)        # [(selection, prob), ...] for the whole market
+
+@dataclass
+class UndersResult:
+    lambda_home: float
+    lambda_away: float
+    model_home: float
+    model_draw: float
+    model_away: float
+    home_prob: float
+    draw_prob: float
+    away_prob: float
+    fair_home_odds: float
+    fair_draw_odds: float
+    fair_away_odds: float
+    matrix: np.ndarray
+    top_scorelines: list
+    under_line: float           # current total + 1.5
+    under_prob: float
+    fair_under_odds: float
+    lay_under: LayRecommendation = None
+    ladder: TotalsLadder = None
+
+
+def result_to_dict(result):
+    """JSON-friendly view of a result record; the scoreline matrix is left out and inf becomes None."""
+    def clean(value):
+        if isinstance(value, LayRecommendation):
+            return {k: clean(v) for k, v in vars(value).items()}
+        if isinstance(value, TotalsLadder):
+            ladder = {k: [clean(float(x)) for x in column] for k, column in vars(value).items() if k != "lays"}
+            ladder["lays"] = [clean(lay) for lay in value.lays]
+            return ladder
+        if isinstance(value, float):
+            return float(value) if math.isfinite(value) else None
+        return value
+
+    out = {}
+    for f in fields(result):
+        value = getattr(result, f.name)
+        if f.name == "matrix":
+            continue
+        if f.name == "top_scorelines":
+            value = [[f"{h}-{a}", clean(p)] for (h, a), p in value]
+        elif f.name in ("lays", "portfolio"):
+            value = [clean(lay) for lay in value]
+        out[f.name] = clean(value)
+    return out
+
+
+# --- Shared Model Stages ---
+def blend_with_market(model_probs, live_odds, market_weight=0.3):
+    """Blend (home, draw, away) model probabilities with normalised market odds."""
+    market = [1 / o if o > 0 else 0 for o in live_odds]
+    market_total = sum(market)
+    if market_total > 0:
+        market = [m / market_total for m in market]
+    final = [p * (1 - market_weight) + m * market_weight for p, m in zip(model_probs, market)]
+    final_sum = sum(final)
+    if final_sum > 0:
+        final = [f / final_sum for f in final]
+    return tuple(final)
+
+def kelly_lay(selection, fair, live, balance, multiplier, cap=None, min_odds=1):
+    """Kelly-sized lay when the live price is shorter than the fair price."""
+    if not (live > min_odds and fair > live):
+        return None
+    edge = (fair - live) / fair
+    liability = balance * max(0, multiplier * edge)
+    if cap is not None:
+        liability = min(liability, balance * cap)
+    stake = liability / (live - 1) if (live - 1) > 0 else 0
+    return LayRecommendation(selection, edge, liability, stake)
+
+def scoreline_matrix(lam_home, lam_away):
+    """Outer product of the two zero-inflated Poisson goal PMFs."""
+    return np.outer(PMF_CACHE.get("zip", lam_home).pmf, PMF_CACHE.get("zip", lam_away).pmf)
+
+def top_scorelines(matrix, home_goals=0, away_goals=0, n=5):
+    """The n most likely scorelines as [((home, away), prob), ...], offset by the current score."""
+    flat = matrix.ravel()
+    order = np.argsort(-flat, kind="stable")[:n]
+    cols = matrix.shape[1]
+    return [((home_goals + int(k // cols), away_goals + int(k % cols)), float(flat[k])) for k in order]
+
+def score_probability(matrix, score, home_goals=0, away_goals=0):
+    """Probability of a final score, or 0.0 if it lies outside the grid."""
+    i, j = score[0] - home_goals, score[1] - away_goals
+    if 0 <= i < matrix.shape[0] and 0 <= j < matrix.shape[1]:
+        return float(matrix[i, j])
+    return 0.0
+
+def matrix_result_probabilities(matrix, goal_diff=0):
+    """Home/draw/away probabilities from a grid of further goals when home leads by goal_diff."""
+    home = np.tril(matrix, goal_diff - 1).sum()
+    draw = np.trace(matrix, offset=goal_diff)
+    away = np.triu(matrix, goal_diff + 1).sum()
+    return float(home), float(draw), float(away)
+
+def totals_distribution(matrix):
+    """P(i + j = t) for each total t, summed along the grid's anti-diagonals."""
+    return np.bincount(_TOTALS_INDEX, weights=matrix.ravel())
+
+def under_probability(totals, max_extra_goals):
+    """Probability that at most max_extra_goals more goals are scored."""
+    if max_extra_goals < 0:
+        return 0.0
+    return float(totals[:max_extra_goals + 1].sum())
+
+def goal_totals(lam_home, lam_away):
+    """P(t more goals) for each total t, convolving the two goal PMFs."""
+    return np.convolve(PMF_CACHE.get("zip", lam_home).pmf, PMF_CACHE.get("zip", lam_away).pmf)
+
+LADDER_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5)
+
+def totals_ladder(totals, current_total=0, lines=LADDER_LINES):
+    """Fair Under/Over prices for every line at once from one cumulative sum of the totals."""
+    lines = np.asarray(lines, dtype=float)
+    cdf = np.cumsum(totals)
+    allowed = np.floor(lines - current_total).astype(int)      # further goals that keep it under
+    under = np.where(allowed >= 0, cdf[np.clip(allowed, 0, len(cdf) - 1)], 0.0)
+    with np.errstate(divide="ignore"):
+        return TotalsLadder(lines, under, 1 - under,
+                            np.where(under > 0, 1 / np.where(under > 0, under, 1), np.inf),
+                            np.where(under < 1, 1 / np.where(under < 1, 1 - under, 1), np.inf))
+
+def ladder_lays(ladder, live_ladder, balance, multiplier, cap=None, min_odds=1):
+    """Kelly lays on either side of each line quoted in live_ladder ({line: (under_odds, over_odds)})."""
+    lays = []
+    for line, fair_under, fair_over in zip(ladder.lines, ladder.fair_under_odds, ladder.fair_over_odds):
+        live_under, live_over = live_ladder.get(float(line), (0.0, 0.0))
+        for side, fair, live in (("Under", fair_under, live_under), ("Over", fair_over, live_over)):
+            lay = kelly_lay(f"{side} {line}", float(fair), live, balance, multiplier, cap, min_odds)
+            if lay:
+                lays.append(lay)
+    ladder.lays = lays
+    return ladder
+
+# --- Model Configuration ---
+@dataclass(frozen=True)
+class ModelConfig:
+    """Coefficients of the in-play model; the defaults are the values the scripts have always used."""
+    decay_rate: float = 0.003
+    decay_floor: float = 0.5
+    late_window: float = 10         # minutes left when the late decay kicks in
+    late_decay: float = 0.75
+    lambda_floor: float = 0.1
+    # (home, away) multipliers for goal difference -2 (or worse) .. +2 (or better)
+    scoreline_factors: tuple = ((0.8, 0.8), (1.2, 0.9), (1.0, 1.0), (0.9, 1.2), (0.8, 1.3))
+    late_factors: tuple = ((1.15, 0.85), (1.15, 0.85), (1.0, 1.0), (0.85, 1.15), (0.85, 1.15))
+    late_minute: float = 75
+    model_weight: float = 0.85      # in-play lambda vs. season averages
+    season_weight: float = 0.15
+    conceded_floor: float = 0.75
+    possession_scale: float = 200
+    xg_threshold: float = 1.2
+    xg_boost: float = 0.15
+    sot_scale: float = 20
+    opp_box_base: float = 20
+    opp_box_scale: float = 200
+    corners_base: float = 4
+    corners_scale: float = 50
+    xg_against_weight: float = 0.1
+    dispersion: float = 3           # Negative Binomial r
+    market_weight: float = 0.3
+
+    def factor_tables(self):
+        return _factor_tables(self.scoreline_factors, self.late_factors)
+
+DEFAULT_CONFIG = ModelConfig()
+
+@lru_cache(maxsize=64)
+def _factor_tables(scoreline_factors, late_factors):
+    return np.array(scoreline_factors), np.array(late_factors)
+
+
+# The in-play stages below broadcast, so they accept either one match as
+# scalars or a whole card as equal-length arrays (see batch.py).
+def time_decay_adjustment(lambda_xg, elapsed, config=DEFAULT_CONFIG):
+    remaining = 90 - elapsed
+    base_decay = np.maximum(np.exp(-config.decay_rate * elapsed), config.decay_floor)
+    base_decay = np.where(remaining < config.late_window, base_decay * config.late_decay, base_decay)
+    return np.maximum(config.lambda_floor, lambda_xg * base_decay)
+
+def adjust_xg_for_scoreline(home, away, lam_home, lam_away, elapsed, config=DEFAULT_CONFIG):
+    scoreline_factors, late_factors = config.factor_tables()
+    state = np.clip(home - away, -2, 2).astype(int) + 2
+    factors = scoreline_factors[state]
+    late = late_factors[np.where(elapsed > config.late_minute, state, 2)]
+    lam_home = lam_home * factors[..., 0] * late[..., 0]
+    lam_away = lam_away * factors[..., 1] * late[..., 1]
+    return lam_home, lam_away
+
+def in_play_lambdas(inputs, config=DEFAULT_CONFIG):
+    """Expected goals for the rest of the match from an in-play snapshot."""
+    c = config
+    elapsed = inputs.elapsed_minutes
+    frac = np.maximum(0.0, (90 - elapsed) / 90.0)
+
+    with stage("time_decay"):
+        lam_h = time_decay_adjustment(inputs.home_xg * frac, elapsed, c)
+        lam_a = time_decay_adjustment(inputs.away_xg * frac, elapsed, c)
+    with stage("scoreline_adjustment"):
+        lam_h, lam_a = adjust_xg_for_scoreline(inputs.home_goals, inputs.away_goals, lam_h, lam_a, elapsed, c)
+
+    with stage("seasonal_blend"):
+        pm_h = inputs.home_avg_scored / np.maximum(c.conceded_floor, inputs.away_avg_conceded)
+        pm_a = inputs.away_avg_scored / np.maximum(c.conceded_floor, inputs.home_avg_conceded)
+        lam_h = (lam_h * c.model_weight) + (pm_h * c.season_weight * frac)
+        lam_a = (lam_a * c.model_weight) + (pm_a * c.season_weight * frac)
+
+    with stage("stat_multipliers"):
+        lam_h *= 1 + ((inputs.home_possession - 50) / c.possession_scale) * frac
+        lam_a *= 1 + ((inputs.away_possession - 50) / c.possession_scale) * frac
+        lam_h *= np.where(inputs.in_game_home_xg > c.xg_threshold, 1 + c.xg_boost * frac, 1.0)
+        lam_a *= np.where(inputs.in_game_away_xg > c.xg_threshold, 1 + c.xg_boost * frac, 1.0)
+        lam_h *= 1 + (inputs.home_sot / c.sot_scale) * frac
+        lam_a *= 1 + (inputs.away_sot / c.sot_scale) * frac
+        lam_h *= 1 + ((inputs.home_opp_box - c.opp_box_base) / c.opp_box_scale) * frac
+        lam_a *= 1 + ((inputs.away_opp_box - c.opp_box_base) / c.opp_box_scale) * frac
+        lam_h *= 1 + ((inputs.home_corners - c.corners_base) / c.corners_scale) * frac
+        lam_a *= 1 + ((inputs.away_corners - c.corners_base) / c.corners_scale) * frac
+
+    # Defensive quality: an opposition conceding above-average xG boosts expected goals
+    with stage("defensive_adjustment"):
+        lam_h *= 1 + (inputs.away_xg_against - 1.0) * c.xg_against_weight * frac
+        lam_a *= 1 + (inputs.home_xg_against - 1.0) * c.xg_against_weight * frac
+    return lam_h, lam_a
+
+def in_play_result_probabilities(lam_h, lam_a, home_goals, away_goals, tail_tol=TAIL_TOLERANCE, r=3):
+    """Bayesian (Negative Binomial, default r=3) home/draw/away probabilities given the current score."""
+    home = PMF_CACHE.get("nb", lam_h, r=r, max_goals=NB_MAX_GOALS)
+    away = PMF_CACHE.get("nb", lam_a, r=r, max_goals=NB_MAX_GOALS)
+    pmf_h = truncate_tail(home.pmf, tail_tol, home.cdf)
+    pmf_a = truncate_tail(away.pmf, tail_tol, away.cdf)
+    hw, dw, aw = result_probabilities(pmf_h, pmf_a, home_goals - away_goals)
+    total = hw + aw + dw
+    if total > 0:
+        hw, aw, dw = hw / total, aw / total, dw / total
+    return hw, dw, aw
+
+
+# --- Pricers ---
+def price_pre_match(inputs):
+    with stage("pre_match_lambdas"):
+        lam_h = ((inputs.home_scored + inputs.home_xg_scored +
+                  inputs.away_conceded + inputs.away_xg_conceded) / 4)
+        lam_h *= (1 - 0.03 * inputs.injuries_home)
+        lam_h += inputs.form_home * 0.1 - inputs.position_home * 0.01
+
+        lam_a = ((inputs.away_scored + inputs.away_xg_scored +
+                  inputs.home_conceded + inputs.home_xg_conceded) / 4)
+        lam_a *= (1 - 0.03 * inputs.injuries_away)
+        lam_a += inputs.form_away * 0.1 - inputs.position_away * 0.01
+
+    with stage("scoreline_grid"):
+        matrix = scoreline_matrix(lam_h, lam_a)
+        model_home, model_draw, model_away = matrix_result_probabilities(matrix)
+
+    with stage("market_blend"):
+        home, draw, away = blend_with_market(
+            (model_home, model_draw, model_away),
+            (inputs.live_home_odds, inputs.live_draw_odds, inputs.live_away_odds))
+
+    with stage("totals"):
+        under = under_probability(totals_distribution(matrix), 2)
+    fair_draw = fair_odds(draw)
+    with stage("kelly"):
+        lay_draw = kelly_lay("Draw", fair_draw, inputs.live_draw_odds, inputs.account_balance,
+                             kelly_multiplier(inputs.kelly_fraction), cap=0.10)
+
+    return PreMatchResult(
+        lambda_home=lam_h, lambda_away=lam_a,
+        model_home=model_home, model_draw=model_draw, model_away=model_away,
+        home_prob=home, draw_prob=draw, away_prob=away,
+        fair_home_odds=fair_odds(home), fair_draw_odds=fair_draw, fair_away_odds=fair_odds(away),
+        matrix=matrix, top_scorelines=top_scorelines(matrix),
+        under_prob=under, over_prob=1 - under,
+        fair_under_odds=fair_odds(under), fair_over_odds=fair_odds(1 - under),
+        lay_draw=lay_draw,
+    )
+
+def price_in_play(inputs, config=DEFAULT_CONFIG, live_ladder=None):
+    lam_h, lam_a, model, matrix, totals = in_play_stages(inputs, config)
+    return in_play_result(inputs, lam_h, lam_a, model, matrix, config, totals, live_ladder)
+
+def in_play_stages(inputs, config=DEFAULT_CONFIG):
+    """Lambdas, Bayesian 1X2, scoreline grid and goal totals shared by the in-play pricers."""
+    lam_h, lam_a = in_play_lambdas(inputs, config)
+    with stage("result_probabilities"):
+        model = in_play_result_probabilities(lam_h, lam_a, inputs.home_goals, inputs.away_goals,
+                                             r=config.dispersion)
+    with stage("scoreline_grid"):
+        matrix = scoreline_matrix(lam_h, lam_a)
+    with stage("totals"):
+        totals = goal_totals(lam_h, lam_a)
+    return lam_h, lam_a, model, matrix, totals
+
+def in_play_result(inputs, lam_h, lam_a, model, matrix, config=DEFAULT_CONFIG, totals=None, live_ladder=None):
+    """
+    Blend, totals and lay-draw stages on top of the model's 1X2 probabilities
+    and scoreline grid; totals are summed off the grid when not supplied.
+    """
+    with stage("market_blend"):
+        home, draw, away = blend_with_market(
+            model, (inputs.live_home_odds, inputs.live_draw_odds, inputs.live_away_odds), config.market_weight)
+    if totals is None:
+        totals = totals_distribution(matrix)
+    current_total = inputs.home_goals + inputs.away_goals
+    under = under_probability(totals, 2 - current_total)
+
+    balance = max(inputs.account_balance, 0)
+    multiplier = kelly_multiplier(inputs.kelly_fraction)
+    fair_draw = fair_odds(draw)
+    with stage("kelly"):
+        lay_draw = kelly_lay("Draw", fair_draw, inputs.live_draw_odds, balance, multiplier, cap=0.10)
+        ladder = ladder_lays(totals_ladder(totals, current_total), live_ladder or {}, balance, multiplier, cap=0.10)
+
+    return InPlayResult(
+        lambda_home=lam_h, lambda_away=lam_a,
+        model_home=model[0], model_draw=model[1], model_away=model[2],
+        home_prob=home, draw_prob=draw, away_prob=away,
+        fair_home_odds=fair_odds(home), fair_draw_odds=fair_draw, fair_away_odds=fair_odds(away),
+        matrix=matrix, top_scorelines=top_scorelines(matrix, inputs.home_goals, inputs.away_goals),
+        under_prob=under, over_prob=1 - under,
+        fair_under_odds=fair_odds(under), fair_over_odds=fair_odds(1 - under),
+        lay_draw=lay_draw, ladder=ladder,
+    )
+
+def price_correct_score(inputs, target_scores, config=DEFAULT_CONFIG, live_ladder=None, max_exposure=0.10):
+    """
+    In-play prices plus Kelly lays on each (score, live odds) target, sized
+    one at a time (lays) and jointly as one book (portfolio, where each
+    liability and the worst-case loss are capped at max_exposure of the balance).
+    """
+    result = price_in_play(inputs, config, live_ladder)
+    multiplier = kelly_multiplier(inputs.kelly_fraction)
+    balance = max(inputs.account_balance, 0)
+    lays = []
+    for score, live_odds in target_scores:
+        f_od = fair_odds(score_probability(result.matrix, score, inputs.home_goals, inputs.away_goals))
+        edge = (live_odds - f_od) / live_odds if live_odds > 0 else 0
+        if edge > 0:
+            liability = balance * (multiplier * edge)
+            stake = liability / (live_odds - 1) if live_odds > 1 else 0
+            lays.append(LayRecommendation(f"{score[0]}-{score[1]}", edge, liability, stake))
+
+    targets = dict(target_scores)     # a repeated score keeps its last price
+    probs = [score_probability(result.matrix, score, inputs.home_goals, inputs.away_goals) for score in targets]
+    with stage("lay_portfolio"):
+        stakes = lay_portfolio(probs, list(targets.values()), multiplier,
+                               max_liability=max_exposure, max_exposure=max_exposure)
+    portfolio = [
+        LayRecommendation(f"{score[0]}-{score[1]}", (fair_odds(p) - odds) / fair_odds(p),
+                          float(balance * x * (odds - 1)), float(balance * x))
+        for (score, odds), p, x in zip(targets.items(), probs, stakes) if x > 0
+    ]
+    book = correct_score_book(result.matrix, inputs.home_goals, inputs.away_goals)
+    return CorrectScoreResult(**vars(result), lays=lays, portfolio=portfolio, book=book)
+
+def correct_score_book(matrix, home_goals=0, away_goals=0, max_goals=3):
+    """
+    Probabilities for every selection of a correct-score market: each final
+    score up to max_goals-max_goals plus Any Other Home Win / Draw / Away Win.
+    """
+    rows, cols = matrix.shape
+    home = home_goals + np.arange(rows)[:, None]
+    away = away_goals + np.arange(cols)[None, :]
+    listed = (home <= max_goals) & (away <= max_goals)
+    book = [(f"{h}-{a}", float(matrix[h - home_goals, a - away_goals]))
+            for h in range(home_goals, max_goals + 1) for a in range(away_goals, max_goals + 1)]
+    other = np.where(listed, 0.0, matrix)
+    book += [("Any Other Home Win", float(other[home > away].sum())),
+             ("Any Other Draw", float(other[home == away].sum())),
+             ("Any Other Away Win", float(other[home < away].sum()))]
+    return book
+
+def price_unders(inputs, config=DEFAULT_CONFIG, live_ladder=None):
+    """In-play prices with a lay of Under (current total + 1.5)."""
+    lam_h, lam_a, model, matrix, totals = in_play_stages(inputs, config)
+    return unders_result(inputs, lam_h, lam_a, model, matrix, config, totals, live_ladder)
+
+def unders_result(inputs, lam_h, lam_a, model, matrix, config=DEFAULT_CONFIG, totals=None, live_ladder=None):
+    """
+    Blend and Under-lay stages on top of the model's 1X2 probabilities and
+    scoreline grid; totals are summed off the grid when not supplied.
+    """
+    with stage("market_blend"):
+        home, draw, away = blend_with_market(
+            model, (inputs.live_home_odds, inputs.live_draw_odds, inputs.live_away_odds), config.market_weight)
+    if totals is None:
+        totals = totals_distribution(matrix)
+    # allow at most floor(limit - current_total) = 1 extra goal
+    current_total = inputs.home_goals + inputs.away_goals
+    limit = current_total + 1.5
+    under = under_probability(totals, 1)
+    fair_under = fair_odds(under)
+    balance = max(inputs.account_balance, 0)
+    multiplier = max(inputs.kelly_fraction / 100.0, 0.001)
+    with stage("kelly"):
+        lay_under = kelly_lay(f"Under {limit}", fair_under, inputs.live_under_odds,
+                              balance, multiplier, min_odds=0)
+        ladder = ladder_lays(totals_ladder(totals, current_total), live_ladder or {}, balance, multiplier,
+                             min_odds=0)
+
+    return UndersResult(
+        lambda_home=lam_h, lambda_away=lam_a,
+        model_home=model[0], model_draw=model[1], model_away=model[2],
+        home_prob=home, draw_prob=draw, away_prob=away,
+        fair_home_odds=fair_odds(home), fair_draw_odds=fair_odds(draw), fair_away_odds=fair_odds(away),
+        matrix=matrix, top_scorelines=top_scorelines(matrix, inputs.home_goals, inputs.away_goals),
+        under_line=limit, under_prob=under, fair_under_odds=fair_under,
+        lay_under=lay_under, ladder=ladder,
+    )
@@ -0,0 +1,101 @@
+"""
+Bulk pre-match pricing for a matchday's fixtures.
+
+Reads a CSV or Parquet file with one fixture per row - the 21 pre.py fields as
+PreMatchInputs columns, plus any identifying columns such as match_id or team
+names - and writes one output row per fixture: the identifying columns, the
+adjusted goal expectations (lambda_home / lambda_away), 1X2 and Under/Over
+fair odds, the top scorelines and the lay-the-draw recommendation.
+
+    python fixtures.py fixtures.csv -o priced.csv
+    python fixtures.py fixtures.parquet -o priced.parquet --balance 1000 --kelly 25
+
+Rows are read, priced with batch.price_pre_match_batch and written one chunk
+at a time, so memory stays flat however many fixtures there are. Missing
+account_balance and kelly_fraction columns fall back to --balance and --kelly.
+"""
+import argparse
+import csv
+import sys
+from dataclasses import fields
+
+import numpy as np
+
+from backtest import numeric_column, read_chunks
+from batch import price_pre_match_batch
+from engine import PreMatchInputs
+
+_INPUT_FIELDS = {f.name for f in fields(PreMatchInputs)}
+
+
+# --- Pricing ---
+def price_fixtures(chunks, balance=0.0, kelly=0.0, top_n=5):
+    """Output column dicts, one per input chunk: pass-through columns, then the priced ones."""
+    for chunk in chunks:
+        n = len(next(iter(chunk.values())))
+        cols = {name: numeric_column(values) for name, values in chunk.items() if name in _INPUT_FIELDS}
+        cols.setdefault("account_balance", np.full(n, balance))
+        cols.setdefault("kelly_fraction", np.full(n, kelly))
+        out = {name: np.asarray(values) for name, values in chunk.items() if name not in _INPUT_FIELDS}
+        out.update(price_pre_match_batch(cols, top_n))
+        yield out
+
+
+# --- Columnar Writers ---
+def write_csv(path, chunks):
+    rows = 0
+    with open(path, "w", newline="") as f:
+        writer = None
+        for chunk in chunks:
+            if writer is None:
+                writer = csv.writer(f)
+                writer.writerow(chunk)
+            columns = [values.tolist() for values in chunk.values()]
+            writer.writerows(zip(*columns))
+            rows += len(columns[0])
+    return rows
+
+def write_parquet(path, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Writing Parquet output needs pyarrow (pip install pyarrow)") from e
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def write_chunks(path, chunks):
+    """Write column dicts to a .csv or .parquet file chunk by chunk; returns the row count."""
+    if path.endswith((".parquet", ".pq")):
+        return write_parquet(path, chunks)
+    return write_csv(path, chunks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price a file of fixtures pre-match.")
+    parser.add_argument("fixtures", help=".csv or .parquet file of PreMatchInputs columns")
+    parser.add_argument("-o", "--output", required=True, help=".csv or .parquet output file")
+    parser.add_argument("--balance", type=float, default=0.0, help="account balance when the file has none")
+    parser.add_argument("--kelly", type=float, default=0.0, help="Kelly %% when the file has none; 0 means 12.5%%")
+    parser.add_argument("--top", type=int, default=5, help="likeliest scorelines to output per fixture")
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    chunks = price_fixtures(read_chunks(args.fixtures, args.chunk_size), args.balance, args.kelly, args.top)
+    rows = write_chunks(args.output, chunks)
+    print(f"Priced {rows} fixtures -> {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
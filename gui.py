@@ -0,0 +1,201 @@
+"""
+Shared Tk plumbing for the GUI scripts.
+
+PricingWindow is the form all four pricing GUIs are built from: a scrollable
+column of labelled entries, a result box and Calculate/Reset buttons. A
+script supplies only its fields, how to read them and how to word a result.
+
+Pricing runs on a background worker thread so the window never freezes; the
+Tk main thread only reads the entries, hands the inputs over and, when the
+result comes back through a queue polled with root.after, renders it in a
+single Text update. Only the newest request matters: one still waiting when
+another arrives is dropped, and a stale result is never drawn over a fresh one.
+"""
+import queue
+import threading
+import tkinter as tk
+
+from profiling import stage
+
+POLL_MS = 25
+DEBOUNCE_MS = 400
+INVALID_INPUT = "Please enter valid numerical values."
+
+
+# --- Background Pricing ---
+class BackgroundPricer:
+    """One daemon worker thread running the latest submitted job; callbacks run on the Tk thread."""
+    def __init__(self, root, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._cond = threading.Condition()
+        self._pending = None
+        self._results = queue.Queue()
+        self._submitted = 0             # generation of the newest job
+        self._finished = 0              # generation of the newest result handled
+        self._polling = False
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, fn, args=(), on_done=None, on_error=None):
+        """Run fn(*args) off the main thread, then on_done(result) or on_error(exception) on it."""
+        with self._cond:
+            self._submitted += 1
+            self._pending = (self._submitted, fn, args, on_done, on_error)
+            self._cond.notify()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    @property
+    def busy(self):
+        return self._finished < self._submitted
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                job, self._pending = self._pending, None
+            generation, fn, args, on_done, on_error = job
+            try:
+                self._results.put((generation, on_done, fn(*args)))
+            except Exception as e:
+                self._results.put((generation, on_error, e))
+
+    def _poll(self):
+        while True:
+            try:
+                generation, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._finished = max(self._finished, generation)
+            if generation == self._submitted and callback is not None:
+                callback(value)
+        if self.busy:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+
+# --- Live Recalculation ---
+def debounce(root, callback, delay_ms=DEBOUNCE_MS):
+    """A trigger that runs callback once, delay_ms after the last of a burst of calls."""
+    after_id = None
+
+    def fire():
+        nonlocal after_id
+        after_id = None
+        callback()
+
+    def trigger(*_):
+        nonlocal after_id
+        if after_id is not None:
+            root.after_cancel(after_id)
+        after_id = root.after(delay_ms, fire)
+    return trigger
+
+def bind_live_recalc(entries, trigger):
+    """Call trigger on every edit of every entry."""
+    for entry in entries.values():
+        entry.bind("<KeyRelease>", trigger, add="+")
+        entry.bind("<<Paste>>", trigger, add="+")
+        entry.bind("<<Cut>>", trigger, add="+")
+
+
+# --- Rendering ---
+def render(widget, text, tag_for=lambda line: "normal"):
+    """Replace the widget's contents with text in one insert, each line tagged by tag_for(line)."""
+    chunks = []
+    for line in text.split("\n"):
+        chunks += [line + "\n", tag_for(line)]
+    widget.config(state="normal")
+    widget.delete("1.0", tk.END)
+    widget.insert(tk.END, *chunks)
+    widget.config(state="disabled")
+
+def show_error(widget, error):
+    if not isinstance(error, ValueError):
+        render(widget, f"Error: {error}")
+        return
+    details = "".join(f"\n  {name}: {message}" for name, message in getattr(error, "errors", {}).items())
+    render(widget, INVALID_INPUT + details)
+
+def clear(widget):
+    widget.config(state="normal")
+    widget.delete("1.0", tk.END)
+    widget.config(state="disabled")
+
+
+# --- Pricing Form ---
+class PricingWindow:
+    """
+    fields is a list of (key, label). read_inputs(values) turns the entry
+    texts, keyed the same way, into the argument tuple for build_insights,
+    raising ValueError on bad input; build_insights runs on the worker and
+    returns the text to show, each line coloured by line_tag(line).
+    """
+    def __init__(self, root, title, fields, read_inputs, build_insights, line_tag):
+        self.read_inputs = read_inputs
+        self.build_insights = build_insights
+        self.line_tag = line_tag
+        root.title(title)
+        self.pricer = BackgroundPricer(root)
+
+        canvas = tk.Canvas(root)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb = tk.Scrollbar(root, orient=tk.VERTICAL, command=canvas.yview)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.configure(yscrollcommand=vsb.set)
+        frame = tk.Frame(canvas)
+        canvas.create_window((0, 0), window=frame, anchor="nw")
+        frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+
+        self.entries = {}
+        for i, (key, text) in enumerate(fields):
+            tk.Label(frame, text=text).grid(row=i, column=0, sticky="e", padx=5, pady=2)
+            self.entries[key] = tk.Entry(frame)
+            self.entries[key].grid(row=i, column=1, padx=5, pady=2)
+        # Recalculate shortly after typing stops
+        bind_live_recalc(self.entries, debounce(root, lambda: self.calculate(live=True)))
+
+        result_frame = tk.Frame(frame, width=800, height=250)
+        result_frame.grid(row=len(fields), column=0, columnspan=2, padx=5, pady=10)
+        result_frame.grid_propagate(False)
+        self.result_text = tk.Text(result_frame, wrap=tk.WORD, bg="white")
+        self.result_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = tk.Scrollbar(result_frame, command=self.result_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.result_text.config(yscrollcommand=scrollbar.set)
+
+        tk.Button(frame, text="Calculate Match Insights", command=self.calculate)\
+          .grid(row=len(fields)+1, column=0, columnspan=2, pady=5)
+        tk.Button(frame, text="Reset All Fields", command=self.reset)\
+          .grid(row=len(fields)+2, column=0, columnspan=2, pady=5)
+
+        self.result_text.tag_configure("insight", foreground="green")
+        self.result_text.tag_configure("lay",     foreground="red")
+        self.result_text.tag_configure("normal",  foreground="black")
+
+    def values(self):
+        return {key: entry.get() for key, entry in self.entries.items()}
+
+    def calculate(self, live=False):
+        """Price on the worker thread; live (typing) recalculations skip half-entered inputs quietly."""
+        try:
+            with stage("parse_inputs"):
+                args = self.read_inputs(self.values())
+        except ValueError as e:
+            if not live:
+                show_error(self.result_text, e)
+            return
+        self.pricer.submit(self.build_insights, args, self.show,
+                           lambda e: show_error(self.result_text, e))
+
+    def show(self, output):
+        with stage("render"):
+            render(self.result_text, output, self.line_tag)
+
+    def reset(self):
+        for entry in self.entries.values():
+            entry.delete(0, tk.END)
+        clear(self.result_text)
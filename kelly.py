@@ -0,0 +1,98 @@
+"""
+Joint Kelly staking across mutually exclusive outcomes.
+
+Sizing each lay on its own ignores that only one final score can happen: a
+book of correct-score lays wins on every selection but one. Here the stakes
+are solved together by maximising expected log bankroll over the outcomes,
+
+    max_x  sum_j p_j * log(1 + (payoffs @ x)_j),   lower <= x <= upper
+
+where x is each bet's stake as a fraction of bankroll and payoffs[j, i] is
+bet i's profit per unit stake if outcome j happens. The objective is concave,
+so a box-projected Newton iteration converges in a handful of steps.
+"""
+import numpy as np
+
+
+# --- Optimiser ---
+def expected_log_growth(payoffs, probs, x):
+    wealth = 1 + payoffs @ x
+    if np.any(wealth <= 0):
+        return -np.inf
+    return float(probs @ np.log(wealth))
+
+def optimise_stakes(payoffs, probs, lower=0.0, upper=np.inf, max_iter=100, tol=1e-12):
+    """Growth-optimal stake fractions within the box [lower, upper]."""
+    payoffs = np.asarray(payoffs, dtype=float)
+    probs = np.asarray(probs, dtype=float)
+    n = payoffs.shape[1]
+    lower = np.broadcast_to(np.asarray(lower, dtype=float), n)
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), n)
+    x = np.clip(np.zeros(n), lower, upper)
+    growth = expected_log_growth(payoffs, probs, x)
+    for _ in range(max_iter):
+        wealth = 1 + payoffs @ x
+        grad = payoffs.T @ (probs / wealth)
+        # bets held at (or within rounding of) a bound by a gradient pushing outwards stay fixed this step
+        fixed = ((x <= lower + 1e-9) & (grad <= 0)) | ((x >= upper - 1e-9) & (grad >= 0))
+        free = ~fixed
+        if not free.any():
+            break
+        step = np.zeros(n)
+        curvature = payoffs[:, free].T @ ((probs / wealth ** 2)[:, None] * payoffs[:, free])
+        step[free] = np.linalg.lstsq(curvature, grad[free], rcond=None)[0]
+
+        t = 1.0
+        while t > 1e-10:
+            trial = np.clip(x + t * step, lower, upper)
+            trial_growth = expected_log_growth(payoffs, probs, trial)
+            if trial_growth >= growth + 1e-4 * grad @ (trial - x):
+                break
+            t *= 0.5
+        else:
+            break
+        moved = np.abs(trial - x).max()
+        x, growth = trial, trial_growth
+        if moved < tol:
+            break
+    return x
+
+def scale_to_exposure(payoffs, x, max_loss):
+    """Shrink x so the worst outcome loses at most max_loss of the bankroll."""
+    worst = -(payoffs @ x).min()
+    if max_loss is not None and worst > max_loss:
+        return x * (max_loss / worst)
+    return x
+
+
+# --- Correct-Score Lays ---
+def lay_payoffs(lay_odds):
+    """
+    (n + 1, n) payoff matrix for laying n distinct scorelines: outcome j < n
+    is selection j winning, outcome n is any other score.
+    """
+    lay_odds = np.asarray(lay_odds, dtype=float)
+    n = len(lay_odds)
+    payoffs = np.ones((n + 1, n))
+    payoffs[np.arange(n), np.arange(n)] = -(lay_odds - 1)
+    return payoffs
+
+def lay_portfolio(probs, lay_odds, multiplier=1.0, max_liability=None, max_exposure=None):
+    """
+    Joint lay stakes (fractions of bankroll) for scorelines with model
+    probabilities probs at lay_odds. The growth-optimal book is scaled by the
+    fractional-Kelly multiplier, each liability is capped at max_liability and
+    the worst-case loss at max_exposure.
+    """
+    probs = np.asarray(probs, dtype=float)
+    lay_odds = np.asarray(lay_odds, dtype=float)
+    payoffs = lay_payoffs(lay_odds)
+    outcome_probs = np.append(probs, max(0.0, 1 - probs.sum()))
+    # an impossible score would never lose, so only priced, possible scores are laid
+    upper = np.where((lay_odds > 1) & (probs > 0), np.inf, 0.0)
+    if max_liability is not None:
+        # cap the full-Kelly stakes so the liability cap holds after the multiplier
+        with np.errstate(divide="ignore"):
+            upper = np.minimum(upper, np.where(lay_odds > 1, max_liability / multiplier / (lay_odds - 1), 0.0))
+    stakes = optimise_stakes(payoffs, outcome_probs, 0.0, upper) * multiplier
+    return scale_to_exposure(payoffs, stakes, max_exposure)
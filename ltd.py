@@ -0,0 +1,159 @@
+"""
+One entry point for every tool in the repo.
+
+    python ltd.py pre                  # the pricing GUIs: pre, inplay, correct-score, unders
+    python ltd.py dashboard --input feed.jsonl
+    python ltd.py price inplay minute=63 home_goals=1 home_xg=1.4 live_draw_odds=3.9
+    python ltd.py price unders --json match.json
+    python ltd.py price inplay --json - --server http://127.0.0.1:8765 < match.json
+    python ltd.py serve --port 9000
+    python ltd.py backtest archive.csv --model inplay
+
+Every other command hands its remaining arguments to that module's main(),
+so `ltd.py <command> --help` shows its own options.
+
+Modules are imported only once a command needs them: the launcher itself
+loads nothing beyond the standard library, `price` loads the engine (and with
+it NumPy) but never Tk, and `price --server` loads neither, asking a running
+`serve` instance instead - the quickest path for cron jobs. main(argv)
+returns the exit code, so tests can drive it directly.
+"""
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# command -> (module, description)
+GUIS = {
+    "pre":           ("pre", "pre-match pricing window"),
+    "inplay":        ("play", "in-play lay-the-draw window"),
+    "correct-score": ("0-0", "in-play correct-score lay window"),
+    "unders":        ("unders", "in-play unders window"),
+}
+TOOLS = {
+    "dashboard": ("dashboard", "many live matches in one sortable window"),
+    "serve":     ("service", "HTTP/WebSocket pricing service"),
+    "backtest":  ("backtest", "lay-the-draw backtest over an archive"),
+    "stream":    ("stream", "re-price a JSON-lines event feed"),
+    "fixtures":  ("fixtures", "bulk pre-match pricing of a fixture list"),
+    "sweep":     ("sweep", "sweep the in-play model coefficients over an archive"),
+    "simulate":  ("simulate", "minute-by-minute Monte Carlo of the rest of a match"),
+    "tradeout":  ("tradeout", "trade-out (green-up) curves for the draw and Under lays"),
+    "portfolio": ("portfolio", "joint Kelly stakes across markets"),
+    "tables":    ("tables", "precomputed lookup tables for low-latency quoting"),
+    "snapshots": ("snapshots", "inspect a priced snapshot store"),
+    "bench":     ("bench", "pricing benchmarks and invariants"),
+    "parsing":   ("schema", "payload parser throughput (payloads/sec)"),
+}
+PRICE_MODELS = ("pre", "inplay", "unders", "correct-score")
+
+
+def load(name):
+    """Import a repo module by name, including ones that are not identifiers (0-0.py)."""
+    if name.isidentifier():
+        return importlib.import_module(name)
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(HERE, name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- Headless Pricing ---
+def read_payload(args):
+    """
+    Match fields from --json (a file, or "-" for stdin; JSON or the compact
+    FIELD=VALUE form) overlaid with FIELD=VALUE arguments.
+    """
+    from payloads import loads, parse_text
+    payload = {}
+    if args.json == "-":
+        payload.update(loads(sys.stdin.read()))
+    elif args.json:
+        with open(args.json) as f:
+            payload.update(loads(f.read()))
+    payload.update(parse_text(" ".join(args.fields)))
+    return payload
+
+def price_local(model, payload):
+    from engine import price_correct_score, price_in_play, price_pre_match, price_unders, result_to_dict
+    from schema import IN_PLAY, PRE_MATCH
+    if model == "pre":
+        return result_to_dict(price_pre_match(PRE_MATCH.record(payload, strict=True)[0]))
+    inputs, targets = IN_PLAY.record(payload, strict=True)
+    if model == "correct-score":
+        return result_to_dict(price_correct_score(inputs, targets or []))
+    return result_to_dict((price_unders if model == "unders" else price_in_play)(inputs))
+
+def price_remote(server, model, payload):
+    """
+    POST the payload to a running `ltd.py serve` and return its priced JSON.
+    Spoken over a bare socket: urllib alone would cost more start-up than the pricing.
+    """
+    import socket
+    host, _, port = server.split("://")[-1].rstrip("/").partition(":")
+    body = json.dumps(payload).encode()
+    head = (f"POST /price/{model} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n")
+    with socket.create_connection((host, int(port or 80)), timeout=30) as sock:
+        sock.sendall(head.encode("latin-1") + body)
+        with sock.makefile("rb") as f:
+            response = f.read()
+    status_line, _, rest = response.partition(b"\r\n")
+    result = json.loads(rest.partition(b"\r\n\r\n")[2])
+    if status_line.split()[1] != b"200":
+        raise ValueError(result.get("error", status_line.decode("latin-1")))
+    return result
+
+def price_command(argv):
+    parser = argparse.ArgumentParser(prog="ltd.py price", description="Price one match and print the result as JSON.")
+    parser.add_argument("model", choices=PRICE_MODELS)
+    parser.add_argument("fields", nargs="*", metavar="FIELD=VALUE",
+                        help='input fields, named as in stream.py events ("minute" for elapsed_minutes)')
+    parser.add_argument("--json", metavar="PATH", help='read fields from a JSON object in PATH ("-" for stdin)')
+    parser.add_argument("--server", metavar="URL", help="price on a running `ltd.py serve` instead of locally")
+    args = parser.parse_intermixed_args(argv)
+    if args.server and args.model == "pre":
+        parser.error("the service prices in-play models only")
+    try:
+        payload = read_payload(args)
+        if args.server:
+            result = price_remote(args.server, args.model, payload)
+        else:
+            result = price_local(args.model, payload)
+    except (ValueError, TypeError) as e:
+        print(f"Invalid input: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(result))
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = argparse.ArgumentParser(
+        prog="ltd.py", description="Lay-the-draw pricing tools.",
+        epilog="\n".join(f"  {name:<14}{text}" for name, (_, text) in {**GUIS, **TOOLS}.items())
+               + "\n  price         price one match headlessly and print JSON",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=[*GUIS, "price", *TOOLS], metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="passed on to the command")
+    if not argv or argv[0] in ("-h", "--help"):
+        parser.print_help()
+        return 0 if argv else 2
+    args = parser.parse_args(argv[:1])
+    rest = argv[1:]
+
+    if args.command == "price":
+        return price_command(rest)
+    if args.command in GUIS:
+        if rest:
+            parser.error(f"{args.command} takes no arguments")
+        load(GUIS[args.command][0]).main()
+        return 0
+    return load(TOOLS[args.command][0]).main(rest) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
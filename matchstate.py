@@ -0,0 +1,283 @@
+"""
+Columnar table of live match states for the dashboard and live tracking.
+
+Every match is one row of NumPy structured arrays. The inputs row holds the
+28 InPlayInputs fields (as float32, or int16 for goals and shots on target)
+plus up to MAX_TARGETS correct-score targets. The prices row holds the
+results of the last pricing, and a dirty flag marks rows whose inputs
+changed since.
+Updates find their row through a dict keyed by match id; reprice() then
+runs price_in_play_batch and the target lays once over just the dirty rows,
+as whole-array operations with no per-match Python objects. A row costs
+ROW_BYTES of array storage; max_matches caps how many the table will hold.
+
+    table = MatchStateTable(max_matches=5000)
+    table.merge({"match_id": "ARS-CHE", "minute": 63, "live_draw_odds": 3.9,
+                 "target_scores": "1-0@3.4,2-1@5.2"})
+    rows = table.reprice()               # row numbers priced this time
+    table.view("ARS-CHE").fair_draw_odds
+    table.memory_usage()["per_match"]
+"""
+import sys
+from dataclasses import fields
+
+import numpy as np
+
+from batch import fair_odds, kelly_multiplier, price_in_play_batch, zip_pmfs
+from distributions import GOAL_RANGE
+from engine import DEFAULT_CONFIG, InPlayInputs
+from stream import event_fields
+
+MAX_TARGETS = 8                # correct-score targets kept per match
+MIN_CAPACITY = 64
+
+INPUT_FIELDS = tuple(f.name for f in fields(InPlayInputs))
+INPUT_DTYPE = np.dtype(
+    [(f.name, "i2" if f.type is int else "f4") for f in fields(InPlayInputs)]
+    + [("target_home", "i2", (MAX_TARGETS,)),
+       ("target_away", "i2", (MAX_TARGETS,)),
+       ("target_odds", "f4", (MAX_TARGETS,))]          # 0 marks an unused slot
+)
+
+PRICE_FIELDS = (
+    "lambda_home", "lambda_away",
+    "home_prob", "draw_prob", "away_prob", "under_prob",
+    "fair_home_odds", "fair_draw_odds", "fair_away_odds", "fair_under_odds", "fair_over_odds",
+    "lay_draw_edge", "lay_draw_liability", "lay_draw_stake",
+)
+PRICE_DTYPE = np.dtype(
+    [(name, "f4") for name in PRICE_FIELDS] + [("lay_draw", "?")]
+    + [("target_prob", "f4", (MAX_TARGETS,)),
+       ("target_edge", "f4", (MAX_TARGETS,)),          # (live - fair) / live, as price_correct_score
+       ("target_stake", "f4", (MAX_TARGETS,))]         # 0 where there is no lay
+)
+
+ROW_BYTES = INPUT_DTYPE.itemsize + PRICE_DTYPE.itemsize + 1     # + the dirty flag
+
+
+def lay_edge(fair, live):
+    """(fair - live) / fair, the engine's lay edge; NaN where there is no live price."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((live > 0) & (fair > 0), (fair - live) / fair, np.nan)
+
+def target_lays(state, lam_h, lam_a):
+    """Probability, lay edge and Kelly lay stake of every target slot, each (N, MAX_TARGETS)."""
+    home = state["target_home"] - state["home_goals"][:, None]
+    away = state["target_away"] - state["away_goals"][:, None]
+    live = state["target_odds"].astype(float)
+    reachable = (live > 0) & (home >= 0) & (home < GOAL_RANGE) & (away >= 0) & (away < GOAL_RANGE)
+    prob = np.where(reachable,
+                    np.take_along_axis(zip_pmfs(lam_h), np.clip(home, 0, GOAL_RANGE - 1), axis=1)
+                    * np.take_along_axis(zip_pmfs(lam_a), np.clip(away, 0, GOAL_RANGE - 1), axis=1),
+                    0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        edge = np.where(live > 0, (live - fair_odds(prob)) / np.where(live > 0, live, 1), 0.0)
+        balance = np.maximum(state["account_balance"], 0)[:, None]
+        liability = np.where(edge > 0, balance * kelly_multiplier(state["kelly_fraction"])[:, None] * edge, 0.0)
+        stake = np.where(live > 1, liability / np.where(live > 1, live - 1, 1), 0.0)
+    return prob, edge, stake
+
+def stored(name, value):
+    """value as field name's storage type; ValueError when the int16/float32 column can't hold it."""
+    kind = INPUT_DTYPE[name].base
+    if kind.kind == "i":
+        info = np.iinfo(kind)
+        if not info.min <= value <= info.max:
+            raise ValueError(f"{name} {value!r} is outside the stored range {info.min}..{info.max}")
+        return kind.type(value)
+    with np.errstate(over="ignore"):
+        cast = kind.type(value)
+    if np.isinf(cast) and not np.isinf(value):
+        raise ValueError(f"{name} {value!r} is too large to store")
+    return cast
+
+
+# --- Match State Table ---
+class MatchStateTable:
+    """Inputs and latest prices of many matches, one row each; rows [0, len) are live."""
+    def __init__(self, capacity=MIN_CAPACITY, config=DEFAULT_CONFIG, max_matches=None):
+        self.config = config
+        self.max_matches = max_matches
+        if max_matches is not None:
+            capacity = min(capacity, max_matches)
+        self.inputs = np.zeros(capacity, dtype=INPUT_DTYPE)
+        self.prices = np.zeros(capacity, dtype=PRICE_DTYPE)
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.ids = []                  # row -> match id
+        self._rows = {}                # match id -> row
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, match_id):
+        return match_id in self._rows
+
+    def row(self, match_id):
+        return self._rows[match_id]
+
+    def view(self, match_id):
+        return MatchState(self, match_id)
+
+    def add(self, match_id):
+        """Row of match_id, appending a blank (dirty) row for a new match."""
+        row = self._rows.get(match_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.inputs):
+                capacity = max(2 * row, MIN_CAPACITY)
+                if self.max_matches is not None:
+                    if row >= self.max_matches:
+                        raise ValueError(f"match-state table is full ({self.max_matches} matches)")
+                    capacity = min(capacity, self.max_matches)
+                self._grow(capacity)
+            self.inputs[row] = 0
+            self.prices[row] = 0
+            self.dirty[row] = True
+            self.ids.append(match_id)
+            self._rows[match_id] = row
+        return row
+
+    def _grow(self, capacity):
+        for name in ("inputs", "prices", "dirty"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, match_id, values, targets=None):
+        """
+        Set input fields (and, if given, the [((home, away), odds), ...] targets)
+        of a match, adding it if new; True if anything changed. Every value is
+        checked against its storage type first, so a rejected update leaves
+        the table as it was.
+        """
+        if targets is not None and len(targets) > MAX_TARGETS:
+            raise ValueError(f"at most {MAX_TARGETS} target scores per match")
+        values = {name: stored(name, value) for name, value in values.items()}
+        if targets is not None:
+            slots = np.zeros((), dtype=INPUT_DTYPE)
+            for i, ((home, away), odds) in enumerate(targets):
+                slots["target_home"][i] = stored("target_home", home)
+                slots["target_away"][i] = stored("target_away", away)
+                slots["target_odds"][i] = stored("target_odds", odds)
+        row = self.add(match_id)
+        inputs = self.inputs
+        changed = bool(self.dirty[row])
+        for name, value in values.items():
+            if inputs[name][row] != value:
+                inputs[name][row] = value
+                changed = True
+        if targets is not None:
+            for name in ("target_home", "target_away", "target_odds"):
+                if not np.array_equal(inputs[name][row], slots[name]):
+                    inputs[name][row] = slots[name]
+                    changed = True
+        self.dirty[row] |= changed
+        return changed
+
+    def merge(self, event):
+        """Merge one stream.py-style event; True if its match now needs repricing."""
+        updates, targets = event_fields(event)
+        return self.update(str(event["match_id"]), updates, targets)
+
+    def remove(self, match_id):
+        """Drop a match, moving the last row into its place."""
+        row = self._rows.pop(match_id)
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            for array in (self.inputs, self.prices, self.dirty):
+                array[row] = array[last]
+            self.ids[row] = moved
+            self._rows[moved] = row
+        self.ids.pop()
+
+    def match_ids(self, rows):
+        return [self.ids[row] for row in rows]
+
+    def targets(self, match_id):
+        """The [((home, away), odds), ...] targets of a match."""
+        state = self.inputs[self.row(match_id)]
+        return [((int(h), int(a)), float(o))
+                for h, a, o in zip(state["target_home"], state["target_away"], state["target_odds"]) if o > 0]
+
+    # --- Pricing ---
+    def columns(self, rows=None):
+        """InPlayInputs field -> array over rows (default all), ready for price_in_play_batch."""
+        state = self.inputs[:len(self.ids)] if rows is None else self.inputs[rows]
+        return {name: state[name] for name in INPUT_FIELDS}
+
+    def reprice(self):
+        """Price every dirty row in one batch; returns the row numbers repriced."""
+        rows = np.flatnonzero(self.dirty[:len(self.ids)])
+        if not len(rows):
+            return rows
+        state = self.inputs[rows]
+        result = price_in_play_batch({name: state[name] for name in INPUT_FIELDS}, self.config)
+        prices = self.prices
+        for name in PRICE_FIELDS:
+            prices[name][rows] = result[name]
+        prices["lay_draw"][rows] = result["lay_draw"]
+        if state["target_odds"].any():
+            prob, edge, stake = target_lays(state, result["lambda_home"], result["lambda_away"])
+        else:
+            prob = edge = stake = 0
+        prices["target_prob"][rows] = prob
+        prices["target_edge"][rows] = edge
+        prices["target_stake"][rows] = stake
+        self.dirty[rows] = False
+        return rows
+
+    def edges(self, rows=None):
+        """Lay edges of home, draw, away and under against the live odds, one (N,) array each."""
+        rows = slice(0, len(self.ids)) if rows is None else rows
+        inputs, prices = self.inputs[rows], self.prices[rows]
+        return {
+            name: lay_edge(prices[f"fair_{name}_odds"], inputs[f"live_{name}_odds"])
+            for name in ("home", "draw", "away", "under")
+        }
+
+    def memory_usage(self):
+        """Bytes held by the arrays (allocated capacity) and the id index, and their mean per match."""
+        arrays = self.inputs.nbytes + self.prices.nbytes + self.dirty.nbytes
+        index = (sys.getsizeof(self.ids) + sys.getsizeof(self._rows)
+                 + sum(sys.getsizeof(match_id) for match_id in self.ids))
+        return {
+            "matches": len(self.ids),
+            "capacity": len(self.inputs),
+            "row_bytes": ROW_BYTES,
+            "array_bytes": arrays,
+            "index_bytes": index,
+            "per_match": (arrays + index) / max(len(self.ids), 1),
+        }
+
+
+class MatchState:
+    """
+    Attribute view of one match (state.elapsed_minutes, state.fair_draw_odds,
+    ...). It holds no values of its own; every read goes to the table's arrays.
+    """
+    __slots__ = ("table", "match_id")
+
+    def __init__(self, table, match_id):
+        self.table = table
+        self.match_id = match_id
+
+    def __getattr__(self, name):
+        row = self.table.row(self.match_id)
+        for array in (self.table.inputs, self.table.prices):
+            if name in array.dtype.names:
+                value = array[name][row]
+                return value.copy() if np.ndim(value) else value.item()
+        raise AttributeError(name)
+
+    @property
+    def targets(self):
+        return self.table.targets(self.match_id)
+
+    @property
+    def dirty(self):
+        return bool(self.table.dirty[self.table.row(self.match_id)])
+
+    def update(self, targets=None, **values):
+        return self.table.update(self.match_id, values, targets)
@@ -0,0 +1,101 @@
+"""
+Payload decoding that needs nothing beyond the standard library.
+
+JSON objects and the compact text form (FIELD=VALUE pairs separated by
+spaces or semicolons) become plain dicts, and the correct-score and totals
+market strings become Python values. Field types and bounds are checked by
+schema.py; keeping this part free of the engine (and NumPy) lets
+`ltd.py price --server` and other thin clients read payloads cheaply.
+"""
+import json
+import re
+
+TARGET_RE = re.compile(r"\s*(\d+)\s*-\s*(\d+)\s*@\s*(\d+(?:\.\d*)?|\.\d+)\s*")
+TARGETS_RE = re.compile(r"(?:%s(?:,|$))*" % TARGET_RE.pattern)    # a whole, well-formed list
+LADDER_RE = re.compile(r"\s*(\d+(?:\.\d*)?)\s*@\s*(\d+(?:\.\d*)?)?\s*(?:/\s*(\d+(?:\.\d*)?)?)?\s*")
+
+
+class InputError(ValueError):
+    """Every invalid field of one payload; errors maps field name -> message."""
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {message}" for name, message in errors.items()))
+
+    def __reduce__(self):              # keep .errors when raised on a pool worker
+        return InputError, (self.errors,)
+
+
+# --- Market Strings ---
+def parse_target_scores(value):
+    """
+    "1-0@3.4,2-1@5.2" (or the JSON form [[[1, 0], 3.4], ...]) into
+    [((1, 0), 3.4), ((2, 1), 5.2)]; raises InputError naming every bad entry.
+    """
+    if not isinstance(value, str):
+        try:
+            return [((int(score[0]), int(score[1])), float(odds)) for score, odds in value]
+        except (TypeError, ValueError, IndexError):
+            raise InputError({"target_scores": f"expected [[home, away], odds] pairs, got {value!r}"}) from None
+    if TARGETS_RE.fullmatch(value):
+        return [((int(home), int(away)), float(odds)) for home, away, odds in TARGET_RE.findall(value)]
+    targets, bad = [], []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        match = TARGET_RE.fullmatch(part)
+        if match is None:
+            bad.append(part.strip())
+        else:
+            home, away, odds = match.groups()
+            targets.append(((int(home), int(away)), float(odds)))
+    if bad:
+        raise InputError({"target_scores": f"expected SCORE@ODDS like 1-0@3.4, got {', '.join(map(repr, bad))}"})
+    return targets
+
+def parse_totals_ladder(value):
+    """
+    "2.5@1.85/2.05,3.5@1.40/" into {2.5: (1.85, 2.05), 3.5: (1.4, 0.0)}
+    (Under/Over odds, 0 where missing); raises InputError naming every bad entry.
+    """
+    ladder, bad = {}, []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        match = LADDER_RE.fullmatch(part)
+        if match is None:
+            bad.append(part.strip())
+        else:
+            line, under, over = match.groups()
+            ladder[float(line)] = (float(under or 0), float(over or 0))
+    if bad:
+        raise InputError({"live_ladder": f"expected LINE@UNDER/OVER like 2.5@1.85/2.05, got {', '.join(map(repr, bad))}"})
+    return ladder
+
+
+# --- Payload Decoding ---
+def parse_text(text):
+    """The compact form "minute=63 home_goals=1 ..." as a dict of strings."""
+    payload, bad = {}, []
+    for token in text.replace(";", " ").split():
+        key, sep, value = token.partition("=")
+        if sep and key:
+            payload[key] = value
+        else:
+            bad.append(token)
+    if bad:
+        raise InputError({token: "expected FIELD=VALUE" for token in bad})
+    return payload
+
+def loads(data):
+    """A payload from a JSON object or the compact text form (str or bytes)."""
+    if isinstance(data, bytes):
+        data = data.decode()
+    if data.lstrip()[:1] in ("{", "["):
+        try:
+            payload = json.loads(data)
+        except ValueError as e:
+            raise InputError({"payload": f"invalid JSON: {e}"}) from None
+        if not isinstance(payload, dict):
+            raise InputError({"payload": "expected a JSON object"})
+        return payload
+    return parse_text(data)
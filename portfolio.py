@@ -0,0 +1,198 @@
+"""
+Joint Kelly staking across every market on a match, and across a card.
+
+Every candidate bet - match odds, totals lines, correct scores - settles on
+the final score, so all of them are laid out as one payoff matrix over the
+scoreline grid of the in-play model and sized together with
+kelly.optimise_stakes. Each bet has one signed stake: positive backs the
+selection at its odds, negative lays it at the same odds.
+
+Matches on a card are independent, so each is solved on its own and the card
+is then scaled down until the summed worst-case losses fit the bankroll cap.
+
+    python portfolio.py card.json --bankroll 1000 --kelly 25
+
+card.json is a list of match objects with InPlayInputs fields (as in
+stream.py), an optional "target_scores" text to lay, an optional
+"live_ladder" of totals lines ("2.5@1.85/2.05,3.5@1.40/3.10" as in
+unders.py, or {"3.5": [1.40, 3.10], ...}) and optional "bets":
+[{"selection": "Over 2.5", "odds": 2.1, "sides": "back"}, ...].
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine import InPlayInputs, kelly_multiplier, price_in_play
+from kelly import optimise_stakes
+from payloads import parse_totals_ladder
+from stream import event_fields
+
+SIDES = ("back", "lay", "both")
+
+
+# --- Bets ---
+@dataclass
+class Bet:
+    selection: str       # "Home", "Draw", "Away", "Under 2.5", "Over 2.5", "1-0", "Any Other Home Win"
+    odds: float
+    sides: str = "both"  # "back", "lay" or "both"
+
+    def __post_init__(self):
+        if self.sides not in SIDES:
+            raise ValueError(f"sides must be one of {', '.join(SIDES)}, got {self.sides!r}")
+
+@dataclass
+class Position:
+    bet: Bet
+    side: str            # "back" or "lay"
+    stake: float         # backer's stake in money
+    risk: float          # what is lost if the bet loses: the stake, or the liability of a lay
+
+def selection_wins(selection, home, away, max_listed=3):
+    """Boolean mask over final scores (home, away arrays) where the selection wins."""
+    if selection == "Home":
+        return home > away
+    if selection == "Draw":
+        return home == away
+    if selection == "Away":
+        return home < away
+    if selection.startswith(("Under ", "Over ")):
+        side, line = selection.split()
+        total = home + away
+        return total < float(line) if side == "Under" else total > float(line)
+    if selection.startswith("Any Other "):
+        unlisted = (home > max_listed) | (away > max_listed)
+        kind = selection[len("Any Other "):]
+        return unlisted & selection_wins({"Home Win": "Home", "Draw": "Draw", "Away Win": "Away"}[kind], home, away)
+    h, a = selection.split("-")
+    return (home == int(h)) & (away == int(a))
+
+def candidate_bets(inputs, target_scores=(), live_ladder=None):
+    """The bets the scripts price: both sides of 1X2 and Under/Over 2.5, lays of each target score and ladder lines."""
+    bets = [Bet(name, odds) for name, odds in (("Home", inputs.live_home_odds), ("Draw", inputs.live_draw_odds),
+                                               ("Away", inputs.live_away_odds), ("Under 2.5", inputs.live_under_odds),
+                                               ("Over 2.5", inputs.live_over_odds))]
+    for line, (under, over) in (live_ladder or {}).items():
+        if line != 2.5:
+            bets += [Bet(f"Under {line}", under), Bet(f"Over {line}", over)]
+    bets += [Bet(f"{h}-{a}", odds, "lay") for (h, a), odds in target_scores]
+    return [bet for bet in bets if bet.odds > 1]
+
+
+# --- Payoffs ---
+def scoreline_outcomes(matrix, home_goals=0, away_goals=0):
+    """Final home goals, away goals and normalised probabilities for every cell of the grid."""
+    home, away = np.indices(matrix.shape)
+    probs = matrix.ravel() / matrix.sum()
+    return (home.ravel() + home_goals), (away.ravel() + away_goals), probs
+
+def payoff_matrix(bets, home, away):
+    """(outcomes, bets) profit per unit of backed stake for each final score."""
+    wins = np.stack([selection_wins(bet.selection, home, away) for bet in bets], axis=1)
+    odds = np.array([bet.odds for bet in bets], dtype=float)
+    return np.where(wins, odds - 1, -1.0)
+
+def _merge_outcomes(payoffs, probs):
+    """Collapse scorelines that settle every bet the same way; the optimiser only sees distinct rows."""
+    rows, inverse = np.unique(payoffs, axis=0, return_inverse=True)
+    return rows, np.bincount(inverse.ravel(), weights=probs, minlength=len(rows))
+
+
+# --- Solvers ---
+def optimise_match(bets, matrix, home_goals=0, away_goals=0, multiplier=1.0, max_exposure=None):
+    """
+    Signed stake fractions of bankroll for bets on one match (positive backs,
+    negative lays), and the worst-case loss of the resulting book.
+    """
+    if not bets:
+        return np.zeros(0), 0.0
+    home, away, probs = scoreline_outcomes(matrix, home_goals, away_goals)
+    payoffs, probs = _merge_outcomes(payoff_matrix(bets, home, away), probs)
+    win_prob = (payoffs > 0).T @ probs
+    odds = np.array([bet.odds for bet in bets])
+    # one price serves both sides, so a book can look like an arbitrage; capping
+    # each bet's risk at max_exposure (or the bankroll) after the multiplier keeps it bounded
+    cap = (1.0 if max_exposure is None else max_exposure) / multiplier
+    lower = np.where([bet.sides == "back" for bet in bets] | (win_prob <= 0), 0.0, -cap / (odds - 1))
+    upper = np.where([bet.sides == "lay" for bet in bets] | (win_prob >= 1), 0.0, cap)
+    x = optimise_stakes(payoffs, probs, lower, upper) * multiplier
+    worst = max(0.0, -(payoffs @ x).min())
+    if max_exposure is not None and worst > max_exposure:
+        x *= max_exposure / worst
+        worst = max_exposure
+    return x, worst
+
+def positions(bets, fractions, bankroll):
+    out = []
+    for bet, x in zip(bets, fractions):
+        stake = abs(x) * bankroll
+        if stake <= 0:
+            continue
+        if x > 0:
+            out.append(Position(bet, "back", stake, stake))
+        else:
+            out.append(Position(bet, "lay", stake, stake * (bet.odds - 1)))
+    return out
+
+def optimise_card(matches, bankroll, multiplier=0.125, max_exposure=0.10, max_total_exposure=0.25):
+    """
+    Joint positions for a card of (inputs, bets) pairs sharing one bankroll:
+    each match's book is capped at max_exposure, and all books are scaled
+    together so their worst cases add up to at most max_total_exposure.
+    """
+    books = []
+    for inputs, bets in matches:
+        result = price_in_play(inputs)
+        books.append(optimise_match(bets, result.matrix, inputs.home_goals, inputs.away_goals,
+                                    multiplier, max_exposure))
+    total = sum(worst for _, worst in books)
+    scale = max_total_exposure / total if total > max_total_exposure else 1.0
+    return [positions(bets, x * scale, bankroll) for (_, bets), (x, _) in zip(matches, books)]
+
+
+def read_ladder(value):
+    """A card's live_ladder, as text or {line: [under, over]}, in candidate_bets' {line: (under, over)} form."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        return parse_totals_ladder(value)
+    return {float(line): (float(under), float(over)) for line, (under, over) in value.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Joint Kelly stakes across markets and matches.")
+    parser.add_argument("card", help='JSON list of matches, or "-" for stdin')
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--kelly", type=float, default=0.0, help="Kelly %%; 0 means 12.5%%")
+    parser.add_argument("--max-exposure", type=float, default=0.10, help="worst-case loss per match")
+    parser.add_argument("--max-total-exposure", type=float, default=0.25, help="summed worst cases")
+    args = parser.parse_args(argv)
+
+    with (sys.stdin if args.card == "-" else open(args.card)) as f:
+        card = json.load(f)
+    matches = []
+    for i, event in enumerate(card):
+        try:
+            updates, targets = event_fields(event)
+            inputs = InPlayInputs(**updates)
+            bets = candidate_bets(inputs, targets or [], read_ladder(event.get("live_ladder")))
+            bets += [Bet(b["selection"], float(b["odds"]), b.get("sides", "both")) for b in event.get("bets", [])]
+        except (ValueError, KeyError, TypeError) as e:
+            parser.error(f"match {event.get('match_id', i)}: {e}")
+        matches.append((inputs, bets))
+
+    books = optimise_card(matches, args.bankroll, kelly_multiplier(args.kelly),
+                          args.max_exposure, args.max_total_exposure)
+    for event, book in zip(card, books):
+        print(f"=== {event.get('match_id', '?')} ===")
+        for p in book:
+            print(f"  {p.side.title()} {p.bet.selection} @ {p.bet.odds:.2f}: Stake {p.stake:.2f}, At Risk {p.risk:.2f}")
+        if not book:
+            print("  No bets.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Per-stage timing for the pricing pipeline.
+
+The engine wraps each stage of a pricing in `with stage("name"):`. While
+profiling is off (the default) stage() hands back one shared no-op context,
+so an instrumented pricing pays a few hundred nanoseconds in total. Switched
+on - LTD_PROFILE=1 in the environment, or enable() - every stage adds its
+wall time to an in-process registry: call count, total, max and a latency
+histogram per stage.
+
+trace(label) groups the stages of one pricing (say, one match) so a slow
+call can be pinned on the stage responsible: calls over the slow threshold
+are kept with their per-stage breakdown in a short ring buffer.
+
+    import profiling
+    profiling.enable(slow_ms=5)
+    with profiling.trace("ARS-CHE"):
+        price_in_play(inputs)
+    print(profiling.to_prometheus())
+    json.dumps(profiling.to_dict())
+
+The GUIs and CLIs need no changes to be profiled: run them with
+LTD_PROFILE=1 LTD_PROFILE_OUT=stages.prom (or .json) and the registry is
+written there on exit. LTD_PROFILE_SLOW_MS sets the slow-call threshold.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+
+# histogram upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+SLOW_CALLS = 100               # slow traces kept
+
+_NULL = nullcontext()
+
+
+# --- Registry ---
+class StageStats:
+    __slots__ = ("calls", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, ns):
+        self.calls += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[bisect_left(BUCKETS, ns / 1e9)] += 1
+
+class Profiler:
+    def __init__(self, enabled=False, slow_ms=None):
+        self.enabled = enabled
+        self.slow_ns = None if slow_ms is None else slow_ms * 1e6
+        self.stages = {}
+        self.slow_calls = deque(maxlen=SLOW_CALLS)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record(self, name, ns):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.add(ns)
+        breakdown = getattr(self._local, "breakdown", None)
+        if breakdown is not None:
+            breakdown[name] = breakdown.get(name, 0) + ns
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.slow_calls.clear()
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+class _Trace:
+    """Collects the stages of one call; keeps the breakdown if the call was slow."""
+    __slots__ = ("profiler", "label", "start", "outer")
+
+    def __init__(self, profiler, label):
+        self.profiler = profiler
+        self.label = label
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.outer = getattr(local, "breakdown", None)
+        local.breakdown = {}
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.start
+        local = self.profiler._local
+        breakdown, local.breakdown = local.breakdown, self.outer
+        slow_ns = self.profiler.slow_ns
+        if slow_ns is not None and elapsed >= slow_ns:
+            self.profiler.slow_calls.append({
+                "label": self.label,
+                "seconds": elapsed / 1e9,
+                "stages": {name: ns / 1e9 for name, ns in sorted(breakdown.items(), key=lambda kv: -kv[1])},
+            })
+        return False
+
+PROFILER = Profiler(enabled=os.environ.get("LTD_PROFILE", "") not in ("", "0"),
+                    slow_ms=float(os.environ.get("LTD_PROFILE_SLOW_MS", 10)))
+
+
+# --- Instrumentation ---
+def stage(name):
+    """Context manager timing one pipeline stage; a shared no-op while profiling is off."""
+    if not PROFILER.enabled:
+        return _NULL
+    return _Stage(PROFILER, name)
+
+def trace(label):
+    """Context manager grouping the stages of one pricing under a label (e.g. a match id)."""
+    if not PROFILER.enabled:
+        return _NULL
+    return _Trace(PROFILER, label)
+
+def enable(slow_ms=None):
+    """Start recording; slow_ms (if given) sets the threshold for keeping slow traces."""
+    if slow_ms is not None:
+        PROFILER.slow_ns = slow_ms * 1e6
+    PROFILER.enabled = True
+
+def disable():
+    PROFILER.enabled = False
+
+def reset():
+    PROFILER.reset()
+
+
+# --- Export ---
+def to_dict():
+    """JSON-friendly snapshot of every stage and the recent slow calls."""
+    with PROFILER._lock:
+        stages = {
+            name: {
+                "calls": s.calls,
+                "total_seconds": s.total_ns / 1e9,
+                "mean_seconds": s.total_ns / s.calls / 1e9,
+                "max_seconds": s.max_ns / 1e9,
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], s.buckets)),
+            }
+            for name, s in PROFILER.stages.items()
+        }
+        return {"enabled": PROFILER.enabled, "stages": stages, "slow_calls": list(PROFILER.slow_calls)}
+
+def to_prometheus(prefix="ltd"):
+    """Prometheus text exposition: a seconds histogram and a max gauge per stage."""
+    lines = [f"# HELP {prefix}_stage_seconds Wall time of each pricing stage.",
+             f"# TYPE {prefix}_stage_seconds histogram"]
+    with PROFILER._lock:
+        stages = sorted(PROFILER.stages.items())
+        for name, s in stages:
+            cumulative = 0
+            for bound, count in zip([repr(b) for b in BUCKETS] + ["+Inf"], s.buckets):
+                cumulative += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s.total_ns / 1e9:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s.calls}')
+        lines += [f"# HELP {prefix}_stage_max_seconds Slowest single call of each pricing stage.",
+                  f"# TYPE {prefix}_stage_max_seconds gauge"]
+        lines += [f'{prefix}_stage_max_seconds{{stage="{name}"}} {s.max_ns / 1e9:.9f}' for name, s in stages]
+    return "\n".join(lines) + "\n"
+
+def dump(path):
+    """Write the registry to path: JSON for .json, Prometheus text otherwise."""
+    with open(path, "w") as f:
+        if path.endswith(".json"):
+            json.dump(to_dict(), f, indent=2)
+        else:
+            f.write(to_prometheus())
+
+if PROFILER.enabled and os.environ.get("LTD_PROFILE_OUT"):
+    atexit.register(dump, os.environ["LTD_PROFILE_OUT"])
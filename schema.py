@@ -0,0 +1,174 @@
+"""
+Validated input parsing shared by the GUIs, the CLIs and the service.
+
+A Schema is built from an input dataclass (InPlayInputs, PreMatchInputs):
+every field converts with its annotated type and must lie inside its bounds,
+"minute" is accepted for elapsed_minutes, and the in-play schema also reads
+correct-score targets. A payload is decoded in one pass and every bad field
+is reported together, as an InputError (a ValueError) whose .errors maps
+field -> message, rather than stopping at the first one.
+
+Payloads are JSON objects or the compact text form, FIELD=VALUE pairs
+separated by spaces or semicolons:
+
+    minute=63 home_goals=1 home_xg=1.4 live_draw_odds=3.9 target_scores=1-0@3.4,2-1@5.2
+
+    values, targets = IN_PLAY.parse({"minute": 63, "home_goals": 1})
+    inputs, targets = IN_PLAY.record(payloads.loads(line))
+
+Decoding the payload text itself (loads, parse_text, the market strings)
+lives in payloads.py, which does not load the engine.
+python schema.py times both forms (payloads/sec) on a synthetic corpus.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from dataclasses import fields
+
+from engine import InPlayInputs, PreMatchInputs
+from payloads import InputError, loads, parse_target_scores
+
+UNBOUNDED = 1e12
+IGNORED = frozenset(("match_id", "ts", "model", "action"))      # routing keys that ride along with inputs
+
+
+# --- Schemas ---
+def _convert(kind, value, blank_as_zero):
+    """value as kind (int or float); raises ValueError or TypeError when it is not one."""
+    if isinstance(value, str):
+        if blank_as_zero and not value.strip():
+            return kind()
+        return kind(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError
+    if kind is int and value != int(value):
+        raise ValueError
+    return kind(value)
+
+class Schema:
+    """Field names, types, aliases and bounds of one input dataclass."""
+    def __init__(self, record_type, aliases=None, bounds=None, targets=False):
+        self.record_type = record_type
+        self.aliases = dict(aliases or {})
+        self.targets = targets
+        bounds = bounds or {}
+        # accepted key -> (field name, type, lower bound, upper bound)
+        self._specs = {f.name: (f.name, f.type, *bounds.get(f.name, (0, UNBOUNDED))) for f in fields(record_type)}
+        for alias, name in self.aliases.items():
+            self._specs[alias] = self._specs[name]
+
+    def parse(self, payload, blank_as_zero=False, strict=False):
+        """
+        (values, targets) from a mapping: values holds the typed fields that
+        were present, targets the correct-score targets (None if absent).
+        Unknown keys are ignored unless strict; blank strings mean 0 with blank_as_zero.
+        """
+        specs = self._specs
+        values, errors, targets = {}, {}, None
+        for key, value in payload.items():
+            spec = specs.get(key)
+            if spec is None:
+                if key == "target_scores" and self.targets:
+                    try:
+                        targets = parse_target_scores(value)
+                    except InputError as e:
+                        errors.update(e.errors)
+                elif strict and key not in IGNORED:
+                    errors[key] = "unknown field"
+                continue
+            name, kind, lo, hi = spec
+            given = type(value)
+            if given is not kind:
+                try:
+                    # JSON numbers and text are the common cases; the rest is checked in full
+                    if given is str and value or given is int and kind is float:
+                        value = kind(value)
+                    else:
+                        value = _convert(kind, value, blank_as_zero)
+                except (ValueError, TypeError, OverflowError):
+                    errors[key] = f"expected {'an integer' if kind is int else 'a number'}, got {value!r}"
+                    continue
+            if not lo <= value <= hi:
+                errors[key] = f"{value!r} is outside {lo:g}..{hi:g}"
+                continue
+            values[name] = value
+        if errors:
+            raise InputError(errors)
+        return values, targets
+
+    def record(self, payload, blank_as_zero=False, strict=False):
+        """(record, targets): the input dataclass built from a payload, missing fields at their defaults."""
+        values, targets = self.parse(payload, blank_as_zero, strict)
+        return self.record_type(**values), targets
+
+    def example(self):
+        """A payload with every field at its default, as a template."""
+        return {name: kind() for name, (_, kind, _, _) in self._specs.items() if name not in self.aliases}
+
+
+PERCENT = (0, 100)
+ANY = (-UNBOUNDED, UNBOUNDED)
+IN_PLAY = Schema(
+    InPlayInputs,
+    aliases={"minute": "elapsed_minutes"},
+    bounds={"elapsed_minutes": (0, 130), "home_possession": PERCENT, "away_possession": PERCENT,
+            "kelly_fraction": PERCENT, "account_balance": ANY},     # the engine stakes nothing below 0
+    targets=True,
+)
+PRE_MATCH = Schema(
+    PreMatchInputs,
+    bounds={"form_home": ANY, "form_away": ANY, "kelly_fraction": PERCENT, "account_balance": ANY},
+)
+
+
+# --- Benchmark ---
+def synthetic_payloads(n=10000):
+    """n full in-play payloads, as JSON lines and in the compact text form."""
+    json_lines, text_lines = [], []
+    for i in range(n):
+        payload = {
+            "match_id": f"M{i}", "minute": 1 + i % 89, "home_goals": i % 3, "away_goals": i % 2,
+            "home_avg_scored": 1.45, "home_avg_conceded": 1.1, "away_avg_scored": 1.2, "away_avg_conceded": 1.35,
+            "home_xg": 1.62, "away_xg": 1.18, "home_xg_against": 1.05, "away_xg_against": 1.4,
+            "in_game_home_xg": 0.84, "in_game_away_xg": 0.41, "home_possession": 56.0, "away_possession": 44.0,
+            "home_sot": 4, "away_sot": 2, "home_opp_box": 21.0, "away_opp_box": 12.0,
+            "home_corners": 5.0, "away_corners": 2.0, "account_balance": 1000.0, "kelly_fraction": 25.0,
+            "live_under_odds": 1.9, "live_over_odds": 2.0, "live_home_odds": 2.1 + (i % 7) / 10,
+            "live_draw_odds": 3.4, "live_away_odds": 3.9, "target_scores": "1-0@7.5,1-1@6.0,2-1@9.0",
+        }
+        json_lines.append(json.dumps(payload))
+        text_lines.append(" ".join(f"{key}={value}" for key, value in payload.items()))
+    return {"json": json_lines, "text": text_lines}
+
+def bench_parsing(n=10000, repeat=3):
+    """Payloads/sec through loads() + IN_PLAY.parse() for each form (fastest of repeat passes)."""
+    report = {}
+    for form, lines in synthetic_payloads(n).items():
+        best = math.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for line in lines:
+                IN_PLAY.parse(loads(line))
+            best = min(best, time.perf_counter() - start)
+        report[form] = n / best
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the payload parser.")
+    parser.add_argument("--payloads", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-rate", type=float, help="fail (exit 1) below this many payloads/sec")
+    args = parser.parse_args(argv)
+    report = bench_parsing(args.payloads, args.repeat)
+    for form, rate in report.items():
+        print(f"{form:<6}{rate:>12.0f} payloads/s")
+    if args.min_rate and min(report.values()) < args.min_rate:
+        print(f"FAIL below {args.min_rate:.0f} payloads/s", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
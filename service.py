@@ -0,0 +1,357 @@
+"""
+Local pricing service for the in-play models.
+
+A long-running asyncio server that prices play.py / unders.py / 0-0.py
+inputs over HTTP and pushes re-priced odds to WebSocket subscribers. The
+model itself runs on a worker pool so the event loop only parses, merges
+state and writes responses.
+
+    python service.py                          # 127.0.0.1:8765, one worker per CPU
+    python service.py --port 9000 --workers 4
+    python service.py --workers 0              # price on the event loop itself
+
+HTTP (JSON or compact FIELD=VALUE bodies, keep-alive):
+    POST /price/<model>            price one payload; nothing is stored
+    POST /matches/<match_id>       merge an event into the match state (?model=...)
+    GET  /matches/<match_id>       current price for a known match (?model=...)
+    GET  /health                   status, plus PMF cache hit rates when pricing in-process
+                                   (--workers 0 or --threads)
+
+WebSocket at /ws, one JSON object per text message:
+    {"action": "subscribe", "match_id": "ARS-CHE", "model": "unders"}
+    {"action": "unsubscribe", "match_id": "ARS-CHE", "model": "unders"}
+    {"action": "update", "match_id": "ARS-CHE", "minute": 63, "home_goals": 1}
+    {"action": "price", "model": "inplay", "minute": 63, "home_xg": 1.4, ...}
+
+<model> is one of inplay, unders or correct-score; payloads use the same
+fields as stream.py events. Every update that changes a match is re-priced
+once per subscribed model and pushed to its subscribers; updates that arrive
+while a price is being computed are coalesced into a single re-price.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from urllib.parse import parse_qs, urlsplit
+
+from distributions import PMF_CACHE
+from engine import InPlayInputs
+from payloads import InputError, loads
+from stream import PRICERS, LiveBook, event_fields, price_match
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_REASONS = {200: "OK", 101: "Switching Protocols", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large"}
+MAX_BODY = 1 << 20
+
+
+# --- Worker Side ---
+def price_event(model, event):
+    """Stateless price of one payload (runs on a pool worker)."""
+    if model not in PRICERS:
+        raise ValueError(f"unknown model {model!r}")
+    updates, targets = event_fields(event)
+    return price_match(model, event.get("match_id"), InPlayInputs(**updates), targets)
+
+
+# --- WebSocket Framing ---
+async def read_frame(reader):
+    """(opcode, payload) of the next complete message, reassembling fragments."""
+    message, opcode = b"", None
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if length > MAX_BODY:
+            raise ValueError("frame too large")
+        mask = await reader.readexactly(4) if b1 & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            key = int.from_bytes((mask * (length // 4 + 1))[:length], "big")
+            payload = (int.from_bytes(payload, "big") ^ key).to_bytes(length, "big")
+        frame_op = b0 & 0x0F
+        if frame_op >= 0x8:           # control frames may arrive mid-message
+            return frame_op, payload
+        if frame_op:
+            opcode = frame_op
+        message += payload
+        if b0 & 0x80:
+            return opcode, message
+
+def encode_frame(payload, opcode=0x1):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class Subscriber:
+    """One WebSocket connection and the (match_id, model) pairs it follows."""
+    def __init__(self, writer):
+        self.writer = writer
+        self.keys = set()
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode_frame(json.dumps(message).encode()))
+
+
+# --- Service ---
+class PricingService:
+    def __init__(self, workers=None, threads=False):
+        self.book = LiveBook()
+        self.subscribers = {}       # (match_id, model) -> set of Subscriber
+        self._inflight = set()
+        self._dirty = set()
+        self._tasks = set()         # running publishes; the loop itself only holds weak references
+        if workers == 0:
+            self.executor = None
+        elif threads:
+            self.executor = ThreadPoolExecutor(workers)
+        else:
+            self.executor = ProcessPoolExecutor(workers)
+
+    async def run_priced(self, fn, *args):
+        if self.executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def price_state(self, match_id, model):
+        if model not in PRICERS:
+            raise ValueError(f"unknown model {model!r}")
+        # snapshot, so later merges can't race a thread-pool worker
+        inputs = replace(self.book.matches[match_id])
+        return await self.run_priced(price_match, model, match_id, inputs,
+                                     self.book.targets.get(match_id))
+
+    def update(self, event):
+        """Merge an event and schedule a re-price for every model subscribed to its match."""
+        match_id = event["match_id"]
+        changed = self.book.merge(event)
+        if changed:
+            for key in self.subscribers:
+                if key[0] == match_id:
+                    task = asyncio.create_task(self._publish(key))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        return changed
+
+    async def _publish(self, key):
+        if key in self._inflight:
+            self._dirty.add(key)
+            return
+        self._inflight.add(key)
+        try:
+            while True:
+                self._dirty.discard(key)
+                try:
+                    message = await self.price_state(*key)
+                except (ValueError, KeyError, TypeError) as e:
+                    message = {"match_id": key[0], "model": key[1], "error": str(e)}
+                for sub in list(self.subscribers.get(key, ())):
+                    sub.send(message)
+                if key not in self._dirty:
+                    break
+        finally:
+            self._inflight.discard(key)
+
+    async def subscribe(self, sub, match_id, model="inplay"):
+        if model not in PRICERS:
+            raise ValueError(f"unknown model {model!r}")
+        key = (match_id, model)
+        self.subscribers.setdefault(key, set()).add(sub)
+        sub.keys.add(key)
+        if match_id in self.book.matches:
+            sub.send(await self.price_state(match_id, model))
+
+    def unsubscribe(self, sub, key):
+        subs = self.subscribers.get(key)
+        if subs:
+            subs.discard(sub)
+            if not subs:
+                del self.subscribers[key]
+        sub.keys.discard(key)
+
+    # --- Connections ---
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.serve_websocket(reader, writer, headers)
+                    break
+                status, payload = await self.route(method, target, body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(response_head(status, {
+                    "Content-Type": "application/json",
+                    "Content-Length": str(len(data)),
+                    "Connection": "keep-alive" if keep_alive else "close",
+                }) + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        parts = url.path.strip("/").split("/")
+        model = parse_qs(url.query).get("model", ["inplay"])[0]
+        try:
+            if parts == ["health"] and method == "GET":
+                health = {"status": "ok", "matches": len(self.book.matches),
+                          "subscriptions": sum(len(s) for s in self.subscribers.values())}
+                if not isinstance(self.executor, ProcessPoolExecutor):   # workers have caches of their own
+                    health["pmf_cache"] = PMF_CACHE.stats()
+                return 200, health
+            if len(parts) == 2 and parts[0] == "price":
+                if method != "POST":
+                    return 405, {"error": "use POST"}
+                return 200, await self.run_priced(price_event, parts[1], loads(body))
+            if len(parts) == 2 and parts[0] == "matches":
+                match_id = parts[1]
+                if method == "POST":
+                    event = loads(body)
+                    event["match_id"] = match_id
+                    self.update(event)
+                elif method != "GET":
+                    return 405, {"error": "use GET or POST"}
+                if match_id not in self.book.matches:
+                    return 404, {"error": f"unknown match {match_id!r}"}
+                return 200, await self.price_state(match_id, model)
+        except InputError as e:
+            return 400, {"error": str(e), "errors": e.errors}
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        return 404, {"error": f"no route for {method} {url.path}"}
+
+    async def serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            data = json.dumps({"error": "missing Sec-WebSocket-Key header"}).encode()
+            writer.write(response_head(400, {
+                "Content-Type": "application/json",
+                "Content-Length": str(len(data)),
+                "Connection": "close",
+            }) + data)
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest())
+        writer.write(response_head(101, {
+            "Upgrade": "websocket",
+            "Connection": "Upgrade",
+            "Sec-WebSocket-Accept": accept.decode(),
+        }))
+        await writer.drain()
+        sub = Subscriber(writer)
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:
+                    writer.write(encode_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(encode_frame(payload, 0xA))
+                elif opcode in (0x1, 0x2):
+                    await self.on_message(sub, payload)
+                await writer.drain()
+        finally:
+            for key in list(sub.keys):
+                self.unsubscribe(sub, key)
+
+    async def on_message(self, sub, payload):
+        try:
+            message = json.loads(payload)
+            action = message.pop("action")
+            if action == "subscribe":
+                await self.subscribe(sub, message["match_id"], message.get("model", "inplay"))
+            elif action == "unsubscribe":
+                self.unsubscribe(sub, (message["match_id"], message.get("model", "inplay")))
+            elif action == "update":
+                self.update(message)
+            elif action == "price":
+                sub.send(await self.run_priced(price_event, message.pop("model", "inplay"), message))
+            else:
+                raise ValueError(f"unknown action {action!r}")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            sub.send({"error": str(e)})
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+
+# --- HTTP Helpers ---
+async def read_request(reader):
+    """(method, target, headers, body) of the next request, or None at end of stream."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target, headers, body
+
+def response_head(status, headers):
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def serve(host, port, workers=None, threads=False):
+    service = PricingService(workers, threads)
+    # warm the pool so the first request doesn't pay for worker start-up
+    await service.run_priced(price_event, "inplay", {})
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Pricing service on http://{host}:{port}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the in-play models over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="pricing workers; 0 prices on the event loop")
+    parser.add_argument("--threads", action="store_true", help="use a thread pool instead of processes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.threads))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
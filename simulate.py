@@ -0,0 +1,251 @@
+"""
+Minute-by-minute Monte Carlo of the rest of an in-play match.
+
+Instead of one lambda per team for the whole remainder, the remaining
+expected goals from in_play_lambdas() are spread over the minutes left and
+re-weighted every minute by the *simulated* scoreline (the ModelConfig
+scoreline and late-game multipliers) and the late-decay window, so a goal
+changes the intensities for the rest of that path. Each minute has at most
+one goal, home or away. Nothing changes between goals, so every path jumps
+straight to its next goal minute (inverse CDF of its state's survival
+curve) and all paths advance goal by goal together as NumPy arrays.
+
+The final-score distribution comes from the paths. Nothing changes state
+before the next goal, so the time to the next goal and the lay-the-draw
+exits are read straight off the same minute probabilities, with trade-out
+prices from an exact backward pass over the goal difference.
+
+    python simulate.py match.json --paths 200000 --seed 7
+    echo '{"minute": 60, "home_xg": 1.4, ...}' | python simulate.py - --json
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine import DEFAULT_CONFIG, InPlayInputs, fair_odds, in_play_lambdas
+from stream import event_fields
+
+BLOCK_PATHS = 100_000          # paths per RNG stream
+
+
+# --- Intensities ---
+def minute_rates(inputs, config=DEFAULT_CONFIG):
+    """
+    Minute starts and expected (home, away) goals in each remaining minute for
+    every goal-difference state -2..+2, shape (steps, 5, 2). With the state
+    frozen at the current score the rates add up to in_play_lambdas().
+    """
+    elapsed = inputs.elapsed_minutes
+    minutes = np.arange(elapsed, 90, 1.0)
+    dt = np.minimum(1.0, 90 - minutes)
+    scoreline, late = config.factor_tables()
+    factors = np.where((minutes > config.late_minute)[:, None, None], scoreline * late, scoreline)
+    shape = np.where(90 - minutes < config.late_window, config.late_decay, 1.0) * dt
+    weights = shape[:, None, None] * factors
+
+    state = int(np.clip(inputs.home_goals - inputs.away_goals, -2, 2)) + 2
+    total = weights[:, state, :].sum(axis=0)
+    lam = np.array(in_play_lambdas(inputs, config), dtype=float)
+    base = np.divide(lam, total, out=np.zeros(2), where=total > 0)
+    return minutes, weights * base
+
+def goal_probabilities(rates):
+    """(P(home goal), P(away goal)) in each minute and state: the first arrival of the two rates."""
+    total = rates.sum(axis=-1, keepdims=True)
+    share = np.divide(rates, total, out=np.zeros_like(rates), where=total > 0)
+    return share * (1 - np.exp(-total))
+
+def draw_probabilities(probs, max_diff):
+    """
+    P(draw at full time) from the start of each minute (row `steps` is full
+    time) for goal differences -max_diff..max_diff, by a backward pass over
+    the same minute model the paths use.
+    """
+    steps = len(probs)
+    diffs = np.arange(-max_diff, max_diff + 1)
+    state = np.clip(diffs, -2, 2) + 2
+    draw = np.zeros((steps + 1, len(diffs)))
+    draw[steps] = diffs == 0
+    for k in range(steps - 1, -1, -1):
+        p_home, p_away = probs[k, state, 0], probs[k, state, 1]
+        after = draw[k + 1]
+        up = np.append(after[1:], 0.0)        # home scores: diff + 1
+        down = np.insert(after[:-1], 0, 0.0)  # away scores: diff - 1
+        draw[k] = p_home * up + p_away * down + (1 - p_home - p_away) * after
+    return draw
+
+
+# --- Simulation ---
+@dataclass
+class SimulationResult:
+    paths: int
+    score_matrix: np.ndarray         # P(final home goals, final away goals)
+    home_prob: float
+    draw_prob: float
+    away_prob: float
+    minutes: np.ndarray              # start of each remaining minute
+    next_goal_probs: np.ndarray      # P(next goal falls in each minute)
+    no_goal_prob: float
+    lay_odds: float
+    exit_minutes: np.ndarray         # T: exit at the first goal or at T; 90 = only on a goal
+    exit_profits: np.ndarray         # expected profit per unit lay stake for each T
+    exit_win_rates: np.ndarray       # P(profit > 0) for each T
+    best_exit_minute: float          # by P(profit), then expected profit
+
+def _survival_table(probs):
+    """
+    -log P(no goal in minutes 0..j-1) for every state, one row per state laid
+    end to end (row s offset by s * span) so one searchsorted serves them all.
+    """
+    p_goal = np.clip(probs.sum(axis=-1), 0, 1 - 1e-12)              # (steps, 5)
+    hazard = np.vstack((np.zeros(5), np.cumsum(-np.log1p(-p_goal), axis=0))).T   # (5, steps + 1)
+    span = hazard[:, -1].max() + 1
+    return (hazard + span * np.arange(5)[:, None]).ravel()
+
+def _simulate_block(rng, probs, table, paths, home_goals, start_diff):
+    """Final (home goals, goal difference) of paths, jumping from goal to goal."""
+    steps = len(probs)
+    home_share = np.divide(probs[..., 0], probs.sum(axis=-1),
+                           out=np.zeros(probs.shape[:2]), where=probs.sum(axis=-1) > 0)
+    home = np.full(paths, home_goals, dtype=np.int64)
+    diff = np.full(paths, start_diff, dtype=np.int64)
+    live = np.arange(paths)
+    minute = np.zeros(paths, dtype=np.int64)             # next minute to play, per live path
+    while len(live):
+        state = np.clip(diff[live], -2, 2) + 2
+        base = state * (steps + 1)
+        target = table[base + minute] - np.log(1 - rng.random(len(live)))
+        end = np.searchsorted(table, target, side="right") - base   # minute after the goal
+        scored = end <= steps
+        live, state, minute = live[scored], state[scored], end[scored]
+        is_home = rng.random(len(live)) < home_share[minute - 1, state]
+        home[live] += is_home
+        diff[live] += np.where(is_home, 1, -1)
+    return home, diff
+
+def simulate_match(inputs, paths=BLOCK_PATHS, seed=None, config=DEFAULT_CONFIG):
+    if paths < 1:
+        raise ValueError("paths must be at least 1")
+    minutes, rates = minute_rates(inputs, config)
+    steps = len(minutes)
+    probs = goal_probabilities(rates)
+    start_diff = inputs.home_goals - inputs.away_goals
+    max_diff = abs(start_diff) + steps + 1           # widest goal difference any path can reach
+    table = _survival_table(probs)
+
+    blocks = -(-paths // BLOCK_PATHS)
+    streams = np.random.SeedSequence(seed).spawn(blocks)
+    parts = [_simulate_block(np.random.default_rng(stream), probs, table,
+                             min(BLOCK_PATHS, paths - i * BLOCK_PATHS), inputs.home_goals, start_diff)
+             for i, stream in enumerate(streams)]
+    home = np.concatenate([p[0] for p in parts])
+    away = home - np.concatenate([p[1] for p in parts])
+
+    size = int(max(home.max(), away.max())) + 1
+    score_matrix = np.bincount(home * size + away, minlength=size * size).reshape(size, size) / paths
+    home_prob = float(np.tril(score_matrix, -1).sum())
+    draw_prob = float(np.trace(score_matrix))
+
+    # --- Next goal: the state is the current one until it arrives ---
+    state = int(np.clip(start_diff, -2, 2)) + 2
+    p_home, p_away = probs[:, state, 0], probs[:, state, 1]
+    quiet = np.concatenate(([1.0], np.cumprod(1 - p_home - p_away)))   # no goal before minute k
+    next_goal = quiet[:steps] * (p_home + p_away)
+
+    # --- Lay-the-draw exits ---
+    # trading out when the draw is at probability p locks in 1 - lay_odds * p per unit stake
+    lay_odds = inputs.live_draw_odds if inputs.live_draw_odds > 1 else fair_odds(draw_prob)
+    draw_at = draw_probabilities(probs, max_diff)
+    col = start_diff + max_diff
+    after_home = 1 - lay_odds * draw_at[1:, col + 1]      # exit the minute after the goal
+    after_away = 1 - lay_odds * draw_at[1:, col - 1]
+    at_t = 1 - lay_odds * draw_at[:, col]
+    goal_weights = quiet[:steps] * np.array([p_home, p_away])
+    exit_profits = np.concatenate(([0.0], np.cumsum(goal_weights[0] * after_home + goal_weights[1] * after_away)))
+    exit_profits += quiet * at_t
+    exit_win_rates = np.concatenate(([0.0], np.cumsum(goal_weights[0] * (after_home > 0)
+                                                      + goal_weights[1] * (after_away > 0))))
+    exit_win_rates += quiet * (at_t > 0)
+    exit_minutes = np.append(minutes, 90.0)
+    best = np.lexsort((-exit_profits, -exit_win_rates))[0]
+
+    return SimulationResult(
+        paths=paths, score_matrix=score_matrix,
+        home_prob=home_prob, draw_prob=draw_prob, away_prob=1 - home_prob - draw_prob,
+        minutes=minutes, next_goal_probs=next_goal, no_goal_prob=float(quiet[steps]),
+        lay_odds=lay_odds, exit_minutes=exit_minutes,
+        exit_profits=exit_profits, exit_win_rates=exit_win_rates,
+        best_exit_minute=float(exit_minutes[best]),
+    )
+
+def check_simulation(inputs, result, sigmas=5):
+    """
+    Invariant violations of one simulation, as messages (empty when all hold):
+    no path ends below the current score, and the current-score cell matches
+    the exact no-goal probability within sampling error.
+    """
+    bad = []
+    matrix = result.score_matrix
+    home, away = inputs.home_goals, inputs.away_goals
+    if matrix[:home].any() or matrix[:, :away].any():
+        bad.append("paths finished below the current score")
+    p = result.no_goal_prob
+    stay = matrix[home, away] if home < len(matrix) and away < len(matrix) else 0.0
+    if abs(stay - p) > sigmas * np.sqrt(p * (1 - p) / result.paths) + 1e-12:
+        bad.append(f"current score {home}-{away} ends {stay:.4f} of paths, no-goal probability is {p:.4f}")
+    if abs(result.home_prob + result.draw_prob + result.away_prob - 1) > 1e-9:
+        bad.append("simulated 1X2 does not sum to 1")
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo the rest of an in-play match.")
+    parser.add_argument("match", help='JSON object of InPlayInputs fields, or "-" for stdin')
+    parser.add_argument("--paths", type=int, default=BLOCK_PATHS)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with (sys.stdin if args.match == "-" else open(args.match)) as f:
+        updates, _ = event_fields(json.load(f))
+    inputs = InPlayInputs(**updates)
+    result = simulate_match(inputs, args.paths, args.seed)
+
+    size = len(result.score_matrix)
+    top = np.argsort(result.score_matrix, axis=None, kind="stable")[::-1][:5]
+    best = int(np.searchsorted(result.exit_minutes, result.best_exit_minute))
+    if args.json:
+        print(json.dumps({
+            "paths": result.paths,
+            "home_prob": result.home_prob, "draw_prob": result.draw_prob, "away_prob": result.away_prob,
+            "top_scorelines": [[f"{i // size}-{i % size}", float(result.score_matrix.flat[i])] for i in top],
+            "minutes": result.minutes.tolist(),
+            "next_goal_probs": result.next_goal_probs.tolist(),
+            "no_goal_prob": result.no_goal_prob,
+            "lay_odds": result.lay_odds,
+            "exit_minutes": result.exit_minutes.tolist(),
+            "exit_profits": result.exit_profits.tolist(),
+            "exit_win_rates": result.exit_win_rates.tolist(),
+            "best_exit_minute": result.best_exit_minute,
+        }))
+        return 0
+
+    print(f"=== Simulation ({result.paths} paths) ===\n")
+    print(f"Home {result.home_prob:.1%} | Draw {result.draw_prob:.1%} | Away {result.away_prob:.1%}\n")
+    print("Top 5 Final Scores:")
+    for i in top:
+        print(f"  {i // size}-{i % size}: {result.score_matrix.flat[i]*100:.1f}%")
+    print(f"\nNo More Goals: {result.no_goal_prob*100:.1f}%")
+    if len(result.minutes) and result.no_goal_prob < 1:
+        wait = result.next_goal_probs @ (result.minutes - inputs.elapsed_minutes + 0.5) / (1 - result.no_goal_prob)
+        print(f"Next Goal: {wait:.1f} min away on average, if it comes")
+    print(f"\nLay Draw @ {result.lay_odds:.2f}, exit at the first goal or minute T:")
+    print(f"  Best T: {result.best_exit_minute:.0f} "
+          f"(wins {result.exit_win_rates[best]:.1%}, EV {result.exit_profits[best]:+.3f} per unit stake)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Append-only binary store of priced in-play snapshots.
+
+Every snapshot is one fixed-size record (RECORD_DTYPE): match id, minute and
+score, the lambdas, the scoreline matrix, the blended fair odds and the live
+odds priced against. Records are appended raw after a 16-byte header and read
+back through a read-only np.memmap, so slicing millions of snapshots costs no
+parsing and no copies until a subset is taken.
+
+A small index sorted by (match_id, minute) is kept next to the store
+(<path>.idx.npz) and rebuilt whenever records have been appended since.
+
+    store = SnapshotStore("snapshots.bin")
+    store.append(snapshot_record("ARS-CHE", inputs, price_in_play(inputs)))
+    store.match("ARS-CHE")["fair_draw_odds"]
+    store.at("ARS-CHE", 60)
+
+    python snapshots.py snapshots.bin                 # summary
+    python snapshots.py snapshots.bin --match ARS-CHE
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from distributions import GOAL_RANGE
+
+MAGIC = b"LTDSNAP1"
+HEADER_SIZE = 16               # magic + record size (uint64)
+MATCH_ID_BYTES = 32
+
+RECORD_DTYPE = np.dtype([
+    ("match_id", f"S{MATCH_ID_BYTES}"),
+    ("ts", "f8"),                      # unix time the snapshot was priced
+    ("minute", "f8"),
+    ("home_goals", "i2"),
+    ("away_goals", "i2"),
+    ("lambda_home", "f8"),
+    ("lambda_away", "f8"),
+    ("matrix", "f4", (GOAL_RANGE, GOAL_RANGE)),   # P(i, j) more goals from the current score
+    ("fair_home_odds", "f8"),
+    ("fair_draw_odds", "f8"),
+    ("fair_away_odds", "f8"),
+    ("fair_under_odds", "f8"),         # Under 2.5, or the unders model's line
+    ("live_home_odds", "f8"),
+    ("live_draw_odds", "f8"),
+    ("live_away_odds", "f8"),
+    ("live_under_odds", "f8"),
+    ("live_over_odds", "f8"),
+])
+
+
+def snapshot_record(match_id, inputs, result, ts=None):
+    """One-record array for an in-play result (InPlayResult, UndersResult, ...) and its inputs."""
+    record = np.zeros(1, dtype=RECORD_DTYPE)
+    key = match_id.encode() if isinstance(match_id, str) else match_id
+    if len(key) > MATCH_ID_BYTES:
+        raise ValueError(f"match id longer than {MATCH_ID_BYTES} bytes: {match_id!r}")
+    record["match_id"] = key
+    record["ts"] = time.time() if ts is None else ts
+    record["minute"] = inputs.elapsed_minutes
+    record["home_goals"] = inputs.home_goals
+    record["away_goals"] = inputs.away_goals
+    for name in ("lambda_home", "lambda_away", "fair_home_odds", "fair_draw_odds",
+                 "fair_away_odds", "fair_under_odds"):
+        record[name] = getattr(result, name)
+    matrix = result.matrix[:GOAL_RANGE, :GOAL_RANGE]
+    record["matrix"][0, :matrix.shape[0], :matrix.shape[1]] = matrix
+    for name in ("live_home_odds", "live_draw_odds", "live_away_odds", "live_under_odds", "live_over_odds"):
+        record[name] = getattr(inputs, name)
+    return record
+
+
+# --- Store ---
+class SnapshotStore:
+    """Fixed-size snapshot records in one file: appended by one writer, memory-mapped for reads."""
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx.npz"
+        self._records = None
+        self._index = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC + np.uint64(RECORD_DTYPE.itemsize).tobytes())
+        else:
+            with open(path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+            if header[:8] != MAGIC or np.frombuffer(header[8:], np.uint64)[0] != RECORD_DTYPE.itemsize:
+                raise ValueError(f"{path} is not a snapshot store in this format")
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+
+    def append(self, records):
+        """Append an array of RECORD_DTYPE records (e.g. from snapshot_record)."""
+        records = np.asarray(records, dtype=RECORD_DTYPE)
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+        self._records = None
+
+    @property
+    def records(self):
+        """Read-only memory map over every record, remapped after appends."""
+        n = len(self)
+        if self._records is None or len(self._records) != n:
+            if n == 0:
+                self._records = np.zeros(0, dtype=RECORD_DTYPE)
+            else:
+                self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                                          offset=HEADER_SIZE, shape=(n,))
+        return self._records
+
+    # --- Index ---
+    def index(self):
+        """
+        (match ids, start offsets, row order): order lists record numbers
+        sorted by (match_id, minute, append order), and match k's rows are
+        order[starts[k]:starts[k + 1]].
+        """
+        n = len(self)
+        if self._index is None or self._index[0] != n:
+            self._index = self._load_index(n) or self._build_index(n)
+        return self._index[1:]
+
+    def _load_index(self, n):
+        if not os.path.exists(self.index_path):
+            return None
+        with np.load(self.index_path) as saved:
+            if int(saved["count"]) != n:
+                return None
+            return n, saved["ids"], saved["starts"], saved["order"]
+
+    def _build_index(self, n):
+        records = self.records
+        order = np.lexsort((np.arange(n), records["minute"], records["match_id"]))
+        ids, starts = np.unique(records["match_id"][order], return_index=True)
+        starts = np.append(starts, n)
+        np.savez(self.index_path, ids=ids, starts=starts, order=order, count=n)
+        return n, ids, starts, order
+
+    def match_ids(self):
+        return [key.decode() for key in self.index()[0]]
+
+    def rows(self, match_id):
+        """Record numbers of one match, by minute."""
+        ids, starts, order = self.index()
+        key = match_id.encode() if isinstance(match_id, str) else match_id
+        k = np.searchsorted(ids, key)
+        if k == len(ids) or ids[k] != key:
+            return order[:0]
+        return order[starts[k]:starts[k + 1]]
+
+    def match(self, match_id):
+        """Every snapshot of one match, by minute (a copy)."""
+        return self.records[self.rows(match_id)]
+
+    def at(self, match_id, minute):
+        """The latest snapshot of a match at or before minute, or None."""
+        rows = self.rows(match_id)
+        k = np.searchsorted(self.records["minute"][rows], minute, side="right")
+        return self.records[rows[k - 1]] if k else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a priced-snapshot store.")
+    parser.add_argument("store", help="snapshot store file")
+    parser.add_argument("--match", help="list one match's snapshots")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    if args.match is None:
+        ids = store.match_ids()
+        print(f"{len(store)} snapshots of {len(ids)} matches ({RECORD_DTYPE.itemsize} bytes each)")
+        return 0
+    print("Minute  Score   Lambda H/A    Fair H/D/A             Live D  Fair U  Live U")
+    for r in store.match(args.match):
+        print(f"{r['minute']:6.0f}  {r['home_goals']}-{r['away_goals']:<4}  "
+              f"{r['lambda_home']:.2f}/{r['lambda_away']:.2f}  "
+              f"{r['fair_home_odds']:6.2f} {r['fair_draw_odds']:6.2f} {r['fair_away_odds']:6.2f}  "
+              f"{r['live_draw_odds']:6.2f}  {r['fair_under_odds']:6.2f}  {r['live_under_odds']:6.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Headless live-feed mode for the in-play models.
+
+Reads match-state events as JSON lines, keeps the latest state per match and
+re-prices only the matches whose inputs actually changed, writing one priced
+update per line:
+
+    {"match_id": "ARS-CHE", "minute": 63, "home_goals": 1, "in_game_home_xg": 1.4,
+     "home_sot": 5, "home_possession": 58, "home_corners": 6, "live_draw_odds": 3.9}
+
+Any InPlayInputs field may appear in an event ("minute" is accepted for
+elapsed_minutes); fields that are left out keep their previous value. With
+--model correct-score a "target_scores" field ("1-0@3.4,2-1@5.2") is used.
+
+    python stream.py                         # events on stdin
+    python stream.py --input feed.jsonl      # read a recorded file
+    python stream.py --input tcp:127.0.0.1:9000
+    python stream.py --input unix:/tmp/feed.sock
+    python stream.py --input feed.jsonl --replay --speed 10
+    python stream.py --input feed.jsonl --snapshots snapshots.bin
+    python stream.py --input feed.jsonl --profile stages.prom
+"""
+import argparse
+import json
+import math
+import socket
+import sys
+import time
+
+import profiling
+from distributions import PMF_CACHE
+from engine import InPlayInputs, price_correct_score, price_in_play, price_unders, result_to_dict
+from schema import IN_PLAY
+from snapshots import SnapshotStore, snapshot_record
+
+FIELD_ALIASES = IN_PLAY.aliases
+
+PRICERS = {
+    "inplay": price_in_play,
+    "unders": price_unders,
+    "correct-score": price_correct_score,
+}
+
+
+# --- Match State ---
+def event_fields(event):
+    """
+    Typed InPlayInputs updates and target scores (or None) carried by one
+    event; an InputError lists every invalid field.
+    """
+    return IN_PLAY.parse(event)
+
+def price_result(model, inputs, targets=None):
+    if model == "correct-score":
+        return PRICERS[model](inputs, targets or [])
+    return PRICERS[model](inputs)
+
+def price_match(model, match_id, inputs, targets=None, result=None):
+    """Priced update for one match as a JSON-friendly dict."""
+    if result is None:
+        result = price_result(model, inputs, targets)
+    update = {"match_id": match_id, "model": model, "minute": inputs.elapsed_minutes,
+              "score": f"{inputs.home_goals}-{inputs.away_goals}"}
+    update.update(result_to_dict(result))
+    return update
+
+class LiveBook:
+    """Latest in-play state per match, merged from partial events."""
+    def __init__(self):
+        self.matches = {}
+        self.targets = {}
+
+    def merge(self, event):
+        """Merge one event into its match; True if any input changed (or the match is new)."""
+        match_id = event["match_id"]
+        updates, targets = event_fields(event)
+        inputs = self.matches.get(match_id)
+        changed = inputs is None
+        if changed:
+            inputs = self.matches[match_id] = InPlayInputs()
+        for name, value in updates.items():
+            if getattr(inputs, name) != value:
+                setattr(inputs, name, value)
+                changed = True
+        if targets is not None and targets != self.targets.get(match_id):
+            self.targets[match_id] = targets
+            changed = True
+        return changed
+
+    def price(self, match_id, model="inplay"):
+        return price_match(model, match_id, self.matches[match_id], self.targets.get(match_id))
+
+    def forget(self, match_id):
+        self.matches.pop(match_id, None)
+        self.targets.pop(match_id, None)
+
+
+# --- Event Sources ---
+def open_source(spec):
+    """Line iterator for "-" (stdin), a file path, "tcp:host:port" or "unix:/path"."""
+    if spec == "-":
+        return sys.stdin
+    if spec.startswith("tcp:"):
+        host, port = spec[4:].rsplit(":", 1)
+        return socket.create_connection((host, int(port))).makefile("r")
+    if spec.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(spec[5:])
+        return sock.makefile("r")
+    return open(spec)
+
+def replay(lines, speed=1.0, time_key="ts"):
+    """Offline stand-in for a live feed: re-emit recorded events paced by their timestamps."""
+    start_wall = start_ts = None
+    for line in lines:
+        if speed > 0 and line.strip():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None    # left for run() to report
+            ts = event.get(time_key) if isinstance(event, dict) else None
+            if isinstance(ts, (int, float)) and not isinstance(ts, bool) and math.isfinite(ts):
+                if start_ts is None:
+                    start_wall, start_ts = time.monotonic(), ts
+                delay = (ts - start_ts) / speed - (time.monotonic() - start_wall)
+                if delay > 0:
+                    time.sleep(delay)
+        yield line
+
+
+def run(lines, out, model="inplay", store=None):
+    """Price each changed match; with a SnapshotStore, every pricing is also appended to it."""
+    book = LiveBook()
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+            if not book.merge(event):
+                continue
+            match_id = event["match_id"]
+            inputs = book.matches[match_id]
+            with profiling.trace(str(match_id)):
+                result = price_result(model, inputs, book.targets.get(match_id))
+            update = price_match(model, match_id, inputs, result=result)
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Skipping bad event: {e}", file=sys.stderr)
+            continue
+        out.write(json.dumps(update) + "\n")
+        out.flush()
+        if store is not None:
+            try:
+                store.append(snapshot_record(str(match_id), inputs, result))
+            except ValueError as e:     # e.g. a match id too long for the record; the update still went out
+                print(f"Not snapshotted: {e}", file=sys.stderr)
+    return book
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-price in-play matches from a JSON-lines event stream.")
+    parser.add_argument("--input", default="-", help='"-", a file, tcp:host:port or unix:/path')
+    parser.add_argument("--model", choices=sorted(PRICERS), default="inplay")
+    parser.add_argument("--replay", action="store_true", help="pace a recorded file by its event timestamps")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up; 0 means as fast as possible")
+    parser.add_argument("--time-key", default="ts")
+    parser.add_argument("--snapshots", help="append every pricing to this snapshot store (see snapshots.py)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time every pricing stage and write the registry here on exit (.json or .prom)")
+    parser.add_argument("--cache-stats", action="store_true", help="print PMF cache hit rates to stderr on exit")
+    args = parser.parse_args(argv)
+
+    lines = open_source(args.input)
+    if args.replay:
+        lines = replay(lines, args.speed, args.time_key)
+    store = SnapshotStore(args.snapshots) if args.snapshots else None
+    if args.profile:
+        profiling.enable()
+    try:
+        run(lines, sys.stdout, args.model, store)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.profile:
+            profiling.dump(args.profile)
+        if args.cache_stats:
+            print(f"PMF cache: {json.dumps(PMF_CACHE.stats())}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Parameter sweep over the in-play model coefficients.
+
+Scores every ModelConfig in a grid by log-loss and Brier score of the blended
+home/draw/away probabilities against final results in a historical archive
+(the backtest.py in-play format: InPlayInputs columns plus final_home_goals
+and final_away_goals).
+
+The archive is parsed once into a feature cache (a directory next to the
+archive holding one .npy per column: the typed inputs and result labels) and
+every worker memory-maps those files, so each configuration only re-runs the
+coefficient-dependent stages: the lambdas, the Negative Binomial 1X2 split
+and the market blend.
+
+Numeric fields take comma-separated values; the scoreline_factors and
+late_factors tables take a JSON list of candidate tables, each five
+[home, away] pairs for goal difference -2 .. +2.
+
+    python sweep.py archive.csv --grid decay_rate=0.002,0.003,0.004 \\
+        --grid season_weight=0.1,0.15,0.2 --grid market_weight=0.2,0.3
+    python sweep.py archive.csv --grid dispersion=2,3,5 --top 5 --json
+    python sweep.py archive.csv --grid 'late_factors=[[[1.2,0.8],[1.2,0.8],[1,1],[0.8,1.2],[0.8,1.2]]]'
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields, replace
+
+import numpy as np
+
+from backtest import numeric_column, read_chunks
+from batch import as_columns, blend_with_market, nb_result_probabilities
+from engine import DEFAULT_CONFIG, InPlayInputs, ModelConfig, in_play_lambdas
+
+_INPUT_FIELDS = [f.name for f in fields(InPlayInputs)]
+_SWEEPABLE = {f.name: f.type for f in fields(ModelConfig) if f.type in (float, int)}
+_TABLES = ("scoreline_factors", "late_factors")
+_EPS = 1e-15
+
+
+# --- Feature Cache ---
+def build_features(archive, cache_path, chunk_size=50000):
+    """Parse the archive once into one .npy per typed column plus 0/1/2 (home/draw/away) outcomes."""
+    parts = {name: [] for name in _INPUT_FIELDS + ["outcome"]}
+    for chunk in read_chunks(archive, chunk_size):
+        n = len(chunk["final_home_goals"])
+        for name in _INPUT_FIELDS:
+            parts[name].append(numeric_column(chunk[name]) if name in chunk else np.zeros(n))
+        diff = numeric_column(chunk["final_home_goals"]) - numeric_column(chunk["final_away_goals"])
+        parts["outcome"].append(np.where(diff > 0, 0, np.where(diff == 0, 1, 2)).astype(np.int8))
+    os.makedirs(cache_path, exist_ok=True)
+    for name, arrays in parts.items():     # outcome last: its mtime marks a complete cache
+        np.save(os.path.join(cache_path, name + ".npy"), np.concatenate(arrays))
+
+def open_features(cache_path):
+    """Column name -> read-only memory map of its .npy in the cache directory."""
+    return {name: np.load(os.path.join(cache_path, name + ".npy"), mmap_mode="r")
+            for name in _INPUT_FIELDS + ["outcome"]}
+
+def load_features(archive, cache_path=None):
+    """Memory-mapped feature cache for archive, rebuilt when missing or older than the archive."""
+    cache_path = cache_path or archive + ".features"
+    marker = os.path.join(cache_path, "outcome.npy")
+    if not os.path.exists(marker) or os.path.getmtime(marker) < os.path.getmtime(archive):
+        build_features(archive, cache_path)
+    return cache_path, open_features(cache_path)
+
+
+# --- Scoring ---
+def score_config(features, config, block=50000):
+    """(log_loss, brier) of config's blended 1X2 probabilities over every row."""
+    outcome = features["outcome"]
+    n = len(outcome)
+    log_loss = brier = 0.0
+    for start in range(0, n, block):
+        rows = slice(start, min(start + block, n))
+        inputs = as_columns(InPlayInputs, {name: features[name][rows] for name in _INPUT_FIELDS})
+        lam_h, lam_a = in_play_lambdas(inputs, config)
+        shape = inputs.home_xg.shape
+        model = nb_result_probabilities(np.broadcast_to(lam_h, shape), np.broadcast_to(lam_a, shape),
+                                        inputs.home_goals, inputs.away_goals, r=config.dispersion)
+        live = np.stack([inputs.live_home_odds, inputs.live_draw_odds, inputs.live_away_odds], axis=1)
+        probs = blend_with_market(model, live, config.market_weight)
+
+        actual = np.eye(3)[outcome[rows]]
+        log_loss -= np.log(np.clip((probs * actual).sum(axis=1), _EPS, 1)).sum()
+        brier += ((probs - actual) ** 2).sum()
+    return log_loss / n, brier / n
+
+_worker_features = None
+
+def _init_worker(cache_path):
+    global _worker_features
+    _worker_features = open_features(cache_path)
+
+def _score_worker(overrides):
+    log_loss, brier = score_config(_worker_features, replace(DEFAULT_CONFIG, **overrides))
+    return {"config": overrides, "log_loss": log_loss, "brier": brier}
+
+
+# --- Sweep ---
+def parse_table(name, table):
+    """One scoreline/late factor table as the tuple of five (home, away) pairs ModelConfig holds."""
+    try:
+        table = tuple((float(home), float(away)) for home, away in table)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} tables are lists of [home, away] pairs") from None
+    if len(table) != 5:
+        raise ValueError(f"{name} tables need 5 pairs (goal difference -2 .. +2), got {len(table)}")
+    return table
+
+def parse_grid(specs):
+    """
+    {"name": [values]} from "name=v1,v2,..." specs over the numeric ModelConfig
+    fields, or "name=[table, ...]" (JSON) for the scoreline and late factor tables.
+    """
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name in _TABLES:
+            try:
+                tables = json.loads(values)
+            except ValueError:
+                raise ValueError(f"{name} takes a JSON list of tables") from None
+            grid[name] = [parse_table(name, table) for table in tables]
+        elif name in _SWEEPABLE:
+            grid[name] = [_SWEEPABLE[name](v) for v in values.split(",") if v]
+        else:
+            raise ValueError(f"{name!r} is not a sweepable ModelConfig field")
+    return grid
+
+def sweep(archive, grid, workers=None, cache_path=None):
+    """Score every combination in grid (plus the defaults); results sorted by log-loss."""
+    cache_path, _ = load_features(archive, cache_path)
+    configs = [{}] + [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cache_path,)) as pool:
+        results = list(pool.map(_score_worker, configs))
+    return sorted(results, key=lambda r: r["log_loss"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid-search the in-play model coefficients.")
+    parser.add_argument("archive", help=".csv or .parquet in-play archive with final scores")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help=f"values to try; one of {', '.join([*_SWEEPABLE, *_TABLES])}")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache", help="feature cache directory (default: <archive>.features)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+    results = sweep(args.archive, grid, args.workers, args.cache)
+    if args.json:
+        print(json.dumps({"defaults": asdict(DEFAULT_CONFIG), "results": results[:args.top]}))
+        return 0
+    for r in results[:args.top]:
+        label = ", ".join(f"{k}={v}" for k, v in r["config"].items()) or "(defaults)"
+        print(f"log-loss {r['log_loss']:.5f}  brier {r['brier']:.5f}  {label}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Precomputed (lam_h, lam_a) lookup tables for ultra-low-latency quoting.
+
+`build_tables` evaluates the exact model once over a regular lambda grid:
+the Negative Binomial home/draw/away split for every goal difference in
+-max_diff..max_diff, and the zero-inflated Poisson scoreline matrix. The
+tables are saved as .npy files next to a meta.json and opened memory-mapped,
+so a live quote is a bilinear lookup instead of a model evaluation.
+
+    python tables.py build tables/
+    python tables.py check tables/ --tolerance 1e-3
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from batch import nb_pmfs, zip_pmfs
+from distributions import NB_MAX_GOALS, result_probabilities, zip_pmf, nb_pmf
+from engine import (in_play_lambdas, in_play_result,
+                    price_in_play, price_unders, unders_result)
+
+_RESULT_FILE = "results.npy"
+_MATRIX_FILE = "matrices.npy"
+_META_FILE = "meta.json"
+
+
+# --- Build ---
+def build_tables(path, lam_max=6.0, step=0.05, max_diff=5):
+    """Evaluate the model over the grid and write the tables to the directory at path."""
+    grid = np.round(np.arange(0.0, lam_max + step / 2, step), 10)
+    n = len(grid)
+    os.makedirs(path, exist_ok=True)
+
+    # 1X2 split for each goal difference, one diagonal of the grid at a time
+    nb = nb_pmfs(grid, max_goals=NB_MAX_GOALS)
+    sf = np.concatenate((np.cumsum(nb[:, ::-1], axis=1)[:, ::-1], np.zeros((n, 1))), axis=1)
+    pmf_ext = np.concatenate((nb, np.zeros((n, 1))), axis=1)
+    mass = nb.sum(axis=1)
+    y = np.arange(NB_MAX_GOALS)
+    results = np.lib.format.open_memmap(
+        os.path.join(path, _RESULT_FILE), mode="w+", dtype=float, shape=(n, n, 2 * max_diff + 1, 3))
+    for d in range(-max_diff, max_diff + 1):
+        need = y - d
+        home = sf[:, np.clip(need + 1, 0, NB_MAX_GOALS)] @ nb.T
+        draw = pmf_ext[:, np.where(need < 0, NB_MAX_GOALS, np.minimum(need, NB_MAX_GOALS))] @ nb.T
+        away = np.outer(mass, mass) - home - draw
+        probs = np.stack([home, draw, away], axis=-1)
+        results[:, :, d + max_diff] = probs / probs.sum(axis=-1, keepdims=True)
+    results.flush()
+
+    zp = zip_pmfs(grid)
+    matrices = np.lib.format.open_memmap(
+        os.path.join(path, _MATRIX_FILE), mode="w+", dtype=float, shape=(n, n) + (zp.shape[1],) * 2)
+    matrices[:] = zp[:, None, :, None] * zp[None, :, None, :]
+    matrices.flush()
+
+    with open(os.path.join(path, _META_FILE), "w") as f:
+        json.dump({"lam_max": float(grid[-1]), "step": step, "size": n, "max_diff": max_diff}, f)
+    return LambdaTable(path)
+
+
+# --- Lookup ---
+class LambdaTable:
+    """Memory-mapped lookup tables with bilinear interpolation in (lam_h, lam_a)."""
+    def __init__(self, path):
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        self.step = meta["step"]
+        self.lam_max = meta["lam_max"]
+        self.size = meta["size"]
+        self.max_diff = meta["max_diff"]
+        self.results = np.load(os.path.join(path, _RESULT_FILE), mmap_mode="r")
+        self.matrices = np.load(os.path.join(path, _MATRIX_FILE), mmap_mode="r")
+
+    def covers(self, lam_h, lam_a, goal_diff):
+        return (0 <= lam_h <= self.lam_max and 0 <= lam_a <= self.lam_max
+                and abs(goal_diff) <= self.max_diff)
+
+    def _interpolate(self, table, lam_h, lam_a):
+        x = lam_h / self.step
+        y = lam_a / self.step
+        i = min(int(x), self.size - 2)
+        j = min(int(y), self.size - 2)
+        t = x - i
+        u = y - j
+        return ((1 - t) * (1 - u) * table[i, j] + t * (1 - u) * table[i + 1, j]
+                + (1 - t) * u * table[i, j + 1] + t * u * table[i + 1, j + 1])
+
+    def result_probabilities(self, lam_h, lam_a, goal_diff):
+        """Interpolated (home, draw, away) model probabilities when home leads by goal_diff."""
+        p = self._interpolate(self.results[:, :, goal_diff + self.max_diff], lam_h, lam_a)
+        return tuple(float(v) for v in p)
+
+    def scoreline_matrix(self, lam_h, lam_a):
+        return self._interpolate(self.matrices, lam_h, lam_a)
+
+
+def quote_in_play(table, inputs):
+    """price_in_play() answered from the tables; falls back to the exact engine off-grid."""
+    lam_h, lam_a = in_play_lambdas(inputs)
+    diff = inputs.home_goals - inputs.away_goals
+    if not table.covers(lam_h, lam_a, diff):
+        return price_in_play(inputs)
+    model = table.result_probabilities(lam_h, lam_a, diff)
+    return in_play_result(inputs, lam_h, lam_a, model, table.scoreline_matrix(lam_h, lam_a))
+
+def quote_unders(table, inputs):
+    """price_unders() answered from the tables; falls back to the exact engine off-grid."""
+    lam_h, lam_a = in_play_lambdas(inputs)
+    diff = inputs.home_goals - inputs.away_goals
+    if not table.covers(lam_h, lam_a, diff):
+        return price_unders(inputs)
+    model = table.result_probabilities(lam_h, lam_a, diff)
+    return unders_result(inputs, lam_h, lam_a, model, table.scoreline_matrix(lam_h, lam_a))
+
+
+# --- Regression Check ---
+def interpolation_error(table, samples=2000, seed=0):
+    """
+    Largest absolute gap between table lookups and the exact model at random
+    off-grid points, for the 1X2 split, the scoreline matrix and Under 2.5.
+    """
+    rng = np.random.default_rng(seed)
+    worst = {"result": 0.0, "scoreline": 0.0, "under_2_5": 0.0}
+    for _ in range(samples):
+        lam_h, lam_a = rng.uniform(0, table.lam_max, 2)
+        diff = int(rng.integers(-table.max_diff, table.max_diff + 1))
+        exact = result_probabilities(nb_pmf(lam_h, max_goals=NB_MAX_GOALS),
+                                     nb_pmf(lam_a, max_goals=NB_MAX_GOALS), diff)
+        exact = np.array(exact) / sum(exact)
+        worst["result"] = max(worst["result"], float(np.abs(
+            np.array(table.result_probabilities(lam_h, lam_a, diff)) - exact).max()))
+
+        exact_matrix = np.outer(zip_pmf(lam_h), zip_pmf(lam_a))
+        matrix = table.scoreline_matrix(lam_h, lam_a)
+        worst["scoreline"] = max(worst["scoreline"], float(np.abs(matrix - exact_matrix).max()))
+        under = np.add.outer(np.arange(matrix.shape[0]), np.arange(matrix.shape[1])) <= 2
+        worst["under_2_5"] = max(worst["under_2_5"],
+                                 abs(float(matrix[under].sum() - exact_matrix[under].sum())))
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the lambda-grid lookup tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("path")
+    build.add_argument("--lam-max", type=float, default=6.0)
+    build.add_argument("--step", type=float, default=0.05)
+    build.add_argument("--max-diff", type=int, default=5)
+    check = sub.add_parser("check")
+    check.add_argument("path")
+    check.add_argument("--samples", type=int, default=2000)
+    check.add_argument("--tolerance", type=float, default=1e-3)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_tables(args.path, args.lam_max, args.step, args.max_diff)
+        return 0
+
+    errors = interpolation_error(LambdaTable(args.path), args.samples)
+    for name, err in errors.items():
+        print(f"{name}: max abs error {err:.2e}")
+    if max(errors.values()) > args.tolerance:
+        print(f"Interpolation error above tolerance {args.tolerance:g}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
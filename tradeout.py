@@ -0,0 +1,170 @@
+"""
+Trade-out (green-up) curves for the draw lay and the Under lay.
+
+For every remaining minute, prices the draw and Under (current total + 1.5)
+with the in-play model as if the clock had reached that minute with no
+further goal, or with one more home or away goal, holding the in-game stats
+at their current values. Each point gives the fair back price and the hedge
+that greens up a lay of `stake` at `odds`:
+
+    hedge stake = stake * odds / back_odds
+    profit      = stake * (1 - odds / back_odds)   (the same whatever the result)
+
+The model's own probabilities are used, not the market blend, since the
+future market price is what is being estimated. All minutes and scenarios
+are priced together in one batch.
+
+Each scenario is also weighted by the chance of being in it when the clock
+reaches that minute (from simulate.py's minute-by-minute goal model), giving
+the expected green-up per minute. Paths with two or more further goals have
+no curve, so the expectation is conditional on at most one more goal and
+the mass left out is reported with it.
+
+    python tradeout.py match.json --market draw
+    python tradeout.py match.json --market under --stake 20 --odds 1.8 --json
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from batch import fair_odds, price_in_play_batch, scoreline_matrices, under_probabilities
+from engine import DEFAULT_CONFIG, InPlayInputs, price_in_play, price_unders
+from simulate import goal_probabilities, minute_rates
+from stream import event_fields
+
+SCENARIOS = ("no goal", "home goal", "away goal")
+
+
+@dataclass
+class TradeOutCurve:
+    market: str                 # "draw" or "under"
+    selection: str
+    lay_odds: float
+    lay_stake: float
+    minutes: np.ndarray
+    # scenario -> {"prob", "back_odds", "hedge_stake", "profit", "weight"}; weight is P(in it at that minute)
+    curves: dict = field(default_factory=dict)
+    expected_profit: np.ndarray = None           # probability-weighted green-up, given at most one more goal
+    other_prob: np.ndarray = None                # P(two or more further goals by that minute)
+
+def scenario_weights(inputs, config=DEFAULT_CONFIG):
+    """
+    P(no goal), P(one home goal) and P(one away goal) since the current
+    score by the start of each remaining minute, by a forward pass over the
+    minute goal probabilities of the current and the one-goal states.
+    """
+    minutes, rates = minute_rates(inputs, config)
+    probs = goal_probabilities(rates)
+    state = int(np.clip(inputs.home_goals - inputs.away_goals, -2, 2)) + 2
+    after = {"home goal": min(state + 1, 4), "away goal": max(state - 1, 0)}
+    weights = {name: np.zeros(len(minutes)) for name in SCENARIOS}
+    quiet, home, away = 1.0, 0.0, 0.0
+    for k in range(len(minutes)):
+        weights["no goal"][k], weights["home goal"][k], weights["away goal"][k] = quiet, home, away
+        p_home, p_away = probs[k, state]
+        home = home * (1 - probs[k, after["home goal"]].sum()) + quiet * p_home
+        away = away * (1 - probs[k, after["away goal"]].sum()) + quiet * p_away
+        quiet *= 1 - p_home - p_away
+    return weights
+
+def trade_out_curves(inputs, market="draw", lay_stake=None, lay_odds=None, config=DEFAULT_CONFIG):
+    """
+    Green-up curves for a lay on `market`. lay_odds defaults to the live price
+    and lay_stake to the engine's recommended stake (1 unit if it has none).
+    """
+    if market not in ("draw", "under"):
+        raise ValueError(f"unknown market {market!r}")
+    current_total = inputs.home_goals + inputs.away_goals
+    if lay_odds is None:
+        lay_odds = inputs.live_draw_odds if market == "draw" else inputs.live_under_odds
+    if lay_stake is None:
+        if market == "draw":
+            lay = price_in_play(inputs, config).lay_draw
+        else:
+            lay = price_unders(inputs, config).lay_under
+        lay_stake = lay.stake if lay else 1.0
+
+    minutes = np.arange(inputs.elapsed_minutes, 90, 1.0)
+    n = len(minutes)
+    goals = {"no goal": (0, 0), "home goal": (1, 0), "away goal": (0, 1)}
+    columns = {name: np.full(3 * n, float(value)) for name, value in asdict(inputs).items()}
+    columns["elapsed_minutes"] = np.tile(minutes, 3)
+    columns["home_goals"] = inputs.home_goals + np.repeat([g[0] for g in goals.values()], n)
+    columns["away_goals"] = inputs.away_goals + np.repeat([g[1] for g in goals.values()], n)
+    priced = price_in_play_batch(columns, config)
+
+    if market == "draw":
+        prob = priced["model_draw"]
+        selection = "Draw"
+    else:
+        # the line stays at the original total + 1.5, so a goal leaves no room for another
+        extra = 1 - (columns["home_goals"] + columns["away_goals"] - current_total)
+        matrices = scoreline_matrices(priced["lambda_home"], priced["lambda_away"])
+        prob = under_probabilities(matrices, extra)
+        selection = f"Under {current_total + 1.5}"
+
+    back_odds = fair_odds(prob)
+    with np.errstate(divide="ignore"):
+        ratio = np.where(np.isfinite(back_odds), lay_odds / back_odds, 0.0)
+    curve = TradeOutCurve(market, selection, lay_odds, lay_stake, minutes)
+    weights = scenario_weights(inputs, config)
+    for i, name in enumerate(SCENARIOS):
+        rows = slice(i * n, (i + 1) * n)
+        curve.curves[name] = {
+            "prob": prob[rows],
+            "back_odds": back_odds[rows],
+            "hedge_stake": lay_stake * ratio[rows],
+            "profit": lay_stake * (1 - ratio[rows]),
+            "weight": weights[name],
+        }
+    covered = sum(weights.values())
+    curve.expected_profit = sum(weights[name] * curve.curves[name]["profit"] for name in SCENARIOS) / covered
+    curve.other_prob = 1 - covered
+    return curve
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Green-up curves for an in-play draw or Under lay.")
+    parser.add_argument("match", help='JSON object of InPlayInputs fields, or "-" for stdin')
+    parser.add_argument("--market", choices=["draw", "under"], default="draw")
+    parser.add_argument("--stake", type=float, help="lay stake (default: the engine's recommendation)")
+    parser.add_argument("--odds", type=float, help="lay odds (default: the live price)")
+    parser.add_argument("--every", type=int, default=5, help="print every Nth minute")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with (sys.stdin if args.match == "-" else open(args.match)) as f:
+        updates, _ = event_fields(json.load(f))
+    curve = trade_out_curves(InPlayInputs(**updates), args.market, args.stake, args.odds)
+
+    if args.json:
+        print(json.dumps({
+            "market": curve.market, "selection": curve.selection,
+            "lay_odds": curve.lay_odds, "lay_stake": curve.lay_stake,
+            "minutes": curve.minutes.tolist(),
+            "curves": {name: {key: [v if np.isfinite(v) else None for v in values.tolist()]
+                              for key, values in points.items()}
+                       for name, points in curve.curves.items()},
+            "expected_profit": curve.expected_profit.tolist(),
+            "other_prob": curve.other_prob.tolist(),
+        }))
+        return 0
+
+    print(f"=== Trade Out: Lay {curve.selection} {curve.lay_stake:.2f} @ {curve.lay_odds:.2f} ===\n")
+    print("Minute  " + "  ".join(f"{name:>36}" for name in SCENARIOS) + f"  {'Expected':>9}  {'2+ goals':>8}")
+    print("        " + "  ".join(f"{'P | Back @ | Hedge | P&L':>36}" for _ in SCENARIOS) + f"  {'P&L':>9}  {'P':>8}")
+    for i in range(0, len(curve.minutes), max(args.every, 1)):
+        cells = []
+        for name in SCENARIOS:
+            c = curve.curves[name]
+            cells.append(f"{c['weight'][i]:6.1%} | {c['back_odds'][i]:8.2f} | {c['hedge_stake'][i]:6.2f} | "
+                         f"{c['profit'][i]:+7.2f}")
+        print(f"{curve.minutes[i]:6.0f}  " + "  ".join(f"{cell:>36}" for cell in cells)
+              + f"  {curve.expected_profit[i]:+9.2f}  {curve.other_prob[i]:8.1%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())